@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+'''show the effect of the bounds of the intermediate values on the hands
+of large integers and targets
+
+for each hand size, largest integer and target, the time of solving the
+seeded hands exactly, then with the bounds, and the answers missed by
+the bounds (the exact answers not found with them). the operations
+pruned as the last ones not giving the target (always skipped) are shown
+with the exact search, and the values dropped by the bounds with the
+bounds
+
+usage: python benchmarks/bench_bounds.py [hands] [seed]'''
+
+from __future__ import absolute_import, print_function, division
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from game24 import calc
+
+
+# (count, largest integer, target)
+CASES = (
+    (4, 13, 24),
+    (4, 100, 24),
+    (4, 100, 1000),
+    (4, 100, 10000),
+    (5, 100, 24),
+    (5, 100, 10000),
+)
+
+
+def bounds_of(largest, target):
+    '''the bounds tried for a case, as (name, Bounds)'''
+    return (
+        ('10x', calc.Bounds(10 * max(largest, target), largest)),
+        ('1x', calc.Bounds(max(largest, target), largest)),
+    )
+
+
+def run(hands, target, engine, bounds=None):
+    stats = calc.SearchStats()
+    answers = []
+    start = time.time()
+    for integers in hands:
+        answers.append(calc.solve(integers, target, stats=stats,
+                                    engine=engine, bounds=bounds))
+    return time.time() - start, answers, stats
+
+
+def main():
+    n = len(sys.argv) > 1 and int(sys.argv[1]) or 10
+    seed = len(sys.argv) > 2 and int(sys.argv[2]) or 24
+    rand = random.Random(seed)
+
+    print('%d hands of each case, seed %d' % (n, seed))
+    print('%-18s %-6s %-6s %10s %8s %8s %12s' % ('case', 'engine',
+                        'bounds', 'time', 'answers', 'missed', 'pruned'))
+    for count, largest, target in CASES:
+        hands = [[rand.randint(1, largest) for i in range(count)]
+                    for j in range(n)]
+        case = '%d of 1-%d, %d' % (count, largest, target)
+        for engine in (calc.ENGINE_SEARCH, calc.ENGINE_MITM):
+            t, exact, stats = run(hands, target, engine)
+            keys = [set([e.canonical_key() for e in a]) for a in exact]
+            # the counters are of the search engine only
+            pruned = engine == calc.ENGINE_SEARCH and stats.oprs_pruned
+            print('%-18s %-6s %-6s %8.1fms %8d %8s %12s' % (case, engine,
+                    'exact', t * 1e3, sum(map(len, exact)), '-',
+                    pruned is False and '-' or pruned))
+
+            for name, bounds in bounds_of(largest, target):
+                t, answers, stats = run(hands, target, engine, bounds)
+                missed = 0
+                for a, k in zip(answers, keys):
+                    found = set([e.canonical_key() for e in a])
+                    missed += len(k - found)
+                bounded = (engine == calc.ENGINE_SEARCH and
+                            stats.oprs_bounded)
+                print('%-18s %-6s %-6s %8.1fms %8d %8d %12s' % (case, engine,
+                        name, t * 1e3, sum(map(len, answers)), missed,
+                        bounded is False and '-' or bounded))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+'''measure the throughput of the bulk mode on random 4-card hands
+
+usage: python benchmarks/bench_bulk.py [lines] [index file]'''
+
+from __future__ import absolute_import, print_function, division
+
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from game24 import batch
+
+
+def main():
+    n = len(sys.argv) > 1 and int(sys.argv[1]) or 20000
+    index_path = len(sys.argv) > 2 and sys.argv[2] or None
+
+    rand = random.Random(24)
+    lines = ['%d %d %d %d' % tuple([rand.randint(1, 13) for i in range(4)])
+                for j in range(n)]
+
+    for fmt in (batch.FORMAT_TSV, batch.FORMAT_JSONL):
+        for jobs in (1, 4):
+            out = io.StringIO()
+            start = time.time()
+            batch.run(lines, out, fmt=fmt, jobs=jobs, index_path=index_path)
+            t = time.time() - start
+            print('%-5s jobs=%d: %8.0f lines/s' % (fmt, jobs, n / t))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+'''measure the cost of calc.canonical_key on the answers of all 4-card hands
+
+usage: python benchmarks/bench_canonical.py [repeat]'''
+
+from __future__ import absolute_import, print_function, division
+
+import itertools
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from game24 import calc
+
+
+def clear_keys(number):
+    number._key = None
+    if isinstance(number, calc.Expr):
+        for rand in number.rands:
+            clear_keys(rand.number)
+
+
+def collect_answers():
+    answers = []
+    for hand in itertools.combinations_with_replacement(range(1, 14), 4):
+        answers.extend(calc.solve(list(hand)))
+    return answers
+
+
+def main():
+    repeat = len(sys.argv) > 1 and int(sys.argv[1]) or 5
+    answers = collect_answers()
+    strings = [str(expr) for expr in answers]
+    n = len(answers)
+
+    def clear():
+        for expr in answers:
+            clear_keys(expr)
+
+    def uncached():
+        for expr in answers:
+            clear_keys(expr)
+            expr.canonical_key()
+
+    def cached():
+        for expr in answers:
+            calc.canonical_key(expr)
+
+    def parse_only():
+        for s in strings:
+            calc.parse(s)
+
+    def from_string():
+        for s in strings:
+            calc.canonical_key(s)
+
+    t_clear = min(timeit.repeat(clear, number=1, repeat=repeat))
+    t_uncached = min(timeit.repeat(uncached, number=1, repeat=repeat))
+    t_cached = min(timeit.repeat(cached, number=1, repeat=repeat))
+    t_parse = min(timeit.repeat(parse_only, number=1, repeat=repeat))
+    t_string = min(timeit.repeat(from_string, number=1, repeat=repeat))
+
+    print('%d answers' % n)
+    print('key, uncached: %8.2f us/key' % ((t_uncached - t_clear) / n * 1e6))
+    print('key, cached:   %8.2f us/key' % (t_cached / n * 1e6))
+    print('key of string: %8.2f us/key (parse %.2f us)' %
+            (t_string / n * 1e6, t_parse / n * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+'''show the deals per second of the deck engine
+
+the deals of count cards from 52 cards, reshuffled when less than count
+are left, by the way Game dealt before deck.Deck (52 new Card objects
+per set, random.randint and list.pop per card with the global random),
+by deck.Deck, and by deck.deals for the integer deals of simulations
+
+usage: python benchmarks/bench_deal.py [deals] [count]'''
+
+from __future__ import absolute_import, print_function, division
+
+import itertools
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from game24 import deck
+
+
+def deal_pop(n, count):
+    '''the deals of Game before the deck engine'''
+    cards = []
+    for i in range(n):
+        if len(cards) < count:
+            random.seed()
+            cards = list(deck.Card(code, integer) for code, integer in
+                        zip(range(52), deck.deck_integers()))
+        hand = []
+        for j in range(count):
+            idx = random.randint(0, len(cards) - 1)
+            hand.append(cards.pop(idx))
+
+
+def deal_deck(n, count):
+    d = deck.Deck(deck.deck_cards(), seed=24)
+    for i in range(n):
+        if d.draw(count) is None:
+            d.shuffle()
+            d.draw(count)
+
+
+def deal_integers(n, count):
+    for integers in itertools.islice(deck.deals(24, count), n):
+        pass
+
+
+def main():
+    n = len(sys.argv) > 1 and int(sys.argv[1]) or 1000000
+    count = len(sys.argv) > 2 and int(sys.argv[2]) or 4
+
+    print('%d deals of %d cards' % (n, count))
+    for name, func in (('pop', deal_pop), ('Deck', deal_deck),
+                        ('deals', deal_integers)):
+        start = time.time()
+        func(n, count)
+        t = time.time() - start
+        print('%-8s %10.3fs %14.0f deals/s' % (name, t, n / t))
+
+    # the same seed deals the same hands
+    assert (list(itertools.islice(deck.deals(7, count), 100)) ==
+            list(itertools.islice(deck.deals(7, count), 100)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+'''measure formatting the answers of all 4-card hands
+
+the strings of the answers formatted cold (every node walked), memoized
+(printed again), in all the styles in one walk against one walk per style,
+and written in bulk to a stream as text and JSON against a write per answer
+
+usage: python benchmarks/bench_format.py [rounds]'''
+
+from __future__ import absolute_import, print_function, division
+
+import io
+import itertools
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from game24 import batch, calc
+
+
+def clear(expr):
+    '''drop the memoized strings of the expr and its sub-exprs'''
+    expr._strs = None
+    for rand in expr.rands:
+        if isinstance(rand.number, calc.Expr):
+            clear(rand.number)
+
+
+def timed(func, answers, rounds, cold=False):
+    t = 0.0
+    for i in range(rounds):
+        if cold:
+            for expr in answers:
+                clear(expr)
+        start = time.time()
+        func(answers)
+        t += time.time() - start
+    return t / rounds
+
+
+def main():
+    rounds = len(sys.argv) > 1 and int(sys.argv[1]) or 5
+    hands = itertools.combinations_with_replacement(range(1, 14), 4)
+    answers = []
+    for integers in hands:
+        answers.extend(calc.solve(list(integers)))
+    print('%d answers' % len(answers))
+
+    def each_style(answers):
+        for style in calc.STYLES:
+            for expr in answers:
+                clear(expr)
+                expr.format(style)
+
+    def one_walk(answers):
+        for expr in answers:
+            clear(expr)
+            expr.formats(calc.STYLES)
+
+    def write_each(answers):
+        out = io.StringIO()
+        for expr in answers:
+            out.write(u'%s\n' % expr)
+
+    def write_text(answers):
+        batch.write_answers(io.StringIO(), answers)
+
+    def write_json(answers):
+        batch.write_answers(io.StringIO(), answers, batch.FORMAT_JSONL)
+
+    for name, func, cold in (
+            ('str, cold', lambda a: [str(e) for e in a], True),
+            ('str, memoized', lambda a: [str(e) for e in a], False),
+            ('3 styles, a walk each', each_style, False),
+            ('3 styles, one walk', one_walk, False),
+            ('write each answer', write_each, False),
+            ('write_answers text', write_text, False),
+            ('write_answers json', write_json, False)):
+        t = timed(func, answers, rounds, cold)
+        print('%-24s %8.2fms %8.0f answers/s' % (name, t * 1e3,
+                                                    len(answers) / t))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+'''compare the memory and time per frontier entry of the State search of
+calc.solve and the packed value-only search of calc.packed_levels
+
+usage: python benchmarks/bench_frontier.py [integer]...'''
+
+from __future__ import absolute_import, print_function, division
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from game24 import calc
+
+
+def deep_sizeof(obj, seen):
+    '''the size of the object graph, shared objects counted once'''
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum([deep_sizeof(o, seen) for o in obj])
+    elif isinstance(obj, dict):
+        size += sum([deep_sizeof(k, seen) + deep_sizeof(v, seen)
+                        for k, v in obj.items()])
+    elif hasattr(obj, '__dict__'):
+        size += deep_sizeof(obj.__dict__, seen)
+    return size
+
+
+def state_levels(integers):
+    '''the frontiers of calc.solve'''
+    cur_states = [calc.State([calc.Number(i) for i in integers])]
+    yield cur_states
+    while cur_states[0].is_computable():
+        child_states = []
+        child_keys = set()
+        for state in cur_states:
+            for child in state.compute():
+                if child.key() not in child_keys:
+                    child_keys.add(child.key())
+                    child_states.append(child)
+        cur_states = child_states
+        yield cur_states
+
+
+def measure(levels):
+    start = time.time()
+    frontiers = list(levels)
+    t = time.time() - start
+    entries = sum([len(f) for f in frontiers])
+    # the level objects are shared by later levels, measured altogether
+    size = deep_sizeof(frontiers, set())
+    return entries, size, t
+
+
+def main():
+    integers = [int(s) for s in sys.argv[1:]] or [1, 2, 3, 4, 5]
+    print('hand: %s' % ' '.join([str(i) for i in integers]))
+
+    for name, levels in (('State', state_levels(integers)),
+                            ('packed', calc.packed_levels(integers))):
+        entries, size, t = measure(levels)
+        print('%-6s %7d entries %10d bytes %7.1f bytes/entry %8.1f ms' %
+                (name, entries, size, size / entries, t * 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+'''compare solving a hand again after one card is replaced, with a
+calc.SolveSession against solving it from scratch
+
+for each size, a seeded hand has one card replaced for a number of
+turns. the mean time to solve it again with the session, with a new
+SubsetSolver (the same engine without the kept values) and with the
+search engine of calc.solve (given a timeout, '+' if it expired), and the
+multisets computed by the session and by the new solver
+
+usage: python benchmarks/bench_incremental.py [turns] [timeout]'''
+
+from __future__ import absolute_import, print_function, division
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from game24 import calc
+
+
+def main():
+    turns = len(sys.argv) > 1 and int(sys.argv[1]) or 10
+    timeout = len(sys.argv) > 2 and float(sys.argv[2]) or 10.0
+    rand = random.Random(24)
+
+    print('%5s %12s %12s %13s %17s' % ('cards', 'session', 'scratch',
+                                        'search', 'computed'))
+    for count in (4, 5, 6, 7):
+        integers = [rand.randint(1, 13) for i in range(count)]
+        session = calc.SolveSession(integers)
+        session.solve()
+
+        t_session = t_scratch = t_search = 0.0
+        computed = computed_scratch = 0
+        expired = ''
+        for i in range(turns):
+            old, new = rand.choice(integers), rand.randint(1, 13)
+            integers.remove(old)
+            integers.append(new)
+
+            start = time.time()
+            computed -= session.solver.computed
+            session.replace(old, new)
+            session.solve()
+            computed += session.solver.computed
+            t_session += time.time() - start
+
+            start = time.time()
+            solver = calc.SubsetSolver()
+            solver.solve(integers)
+            computed_scratch += solver.computed
+            t_scratch += time.time() - start
+
+            start = time.time()
+            if calc.solve(integers, timeout=timeout).truncated:
+                expired = '+'
+            t_search += time.time() - start
+
+        print('%5d %11.2fms %11.2fms %11.2fms%1s %8d/%8d' % (count,
+                t_session / turns * 1e3, t_scratch / turns * 1e3,
+                t_search / turns * 1e3, expired, computed, computed_scratch))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+'''compare the meet-in-the-middle engine of calc.solve with the search on
+seeded random hands of 7 to 10 cards
+
+for each size, the time to find the first answer and all the answers
+with the mitm engine, and to find the first answer with the search, each
+given a timeout. a solve stopped by the timeout is marked with '+'
+
+usage: python benchmarks/bench_mitm.py [hands] [timeout]'''
+
+from __future__ import absolute_import, print_function, division
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from game24 import calc
+
+
+def timed(integers, timeout, **kwargs):
+    start = time.time()
+    answers = calc.solve(integers, timeout=timeout, **kwargs)
+    t = time.time() - start
+    # a limited solve is truncated once it found enough answers
+    stopped = answers.truncated and t >= timeout
+    return t, len(answers), stopped
+
+
+def main():
+    n = len(sys.argv) > 1 and int(sys.argv[1]) or 5
+    timeout = len(sys.argv) > 2 and float(sys.argv[2]) or 10.0
+    rand = random.Random(24)
+
+    print('%5s %20s %20s %20s' % ('cards', 'mitm first', 'mitm all',
+                                    'search first'))
+    for count in (7, 8, 9, 10):
+        totals = [[0.0, 0, ''] for i in range(3)]
+        for i in range(n):
+            integers = [rand.randint(1, 13) for j in range(count)]
+            results = (
+                timed(integers, timeout, engine=calc.ENGINE_MITM, limit=1),
+                timed(integers, timeout, engine=calc.ENGINE_MITM),
+                timed(integers, timeout, limit=1),
+            )
+            for total, (t, answers, stopped) in zip(totals, results):
+                total[0] += t
+                total[1] += answers
+                if stopped:
+                    total[2] = '+'
+
+        print('%5d %s' % (count, ' '.join(['%11.3fs%1s %6d' % (
+                t / n, stopped, answers) for t, answers, stopped in totals])))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+'''show the search cost of each extra operator of the registry
+
+for each set of operators, the states generated, the operations computed
+and the time of searching all the answers of the seeded hands, and the
+hands solvable with them, compared with + - * / only
+
+usage: python benchmarks/bench_operators.py [count] [hands] [seed]'''
+
+from __future__ import absolute_import, print_function, division
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from game24 import calc
+
+
+OPERATOR_SETS = (
+    (),
+    ('^',),
+    ('!',),
+    ('sqrt',),
+    ('|',),
+    ('^', '!', 'sqrt', '|'),
+)
+
+
+def main():
+    count = len(sys.argv) > 1 and int(sys.argv[1]) or 4
+    n = len(sys.argv) > 2 and int(sys.argv[2]) or 10
+    seed = len(sys.argv) > 3 and int(sys.argv[3]) or 24
+    rand = random.Random(seed)
+    hands = [[rand.randint(1, 13) for i in range(count)] for j in range(n)]
+
+    print('%d hands of %d cards, seed %d' % (n, count, seed))
+    print('%-16s %10s %10s %8s %10s %8s' % ('operators', 'states',
+                                'oprs', 'solved', 'time', 'x base'))
+    base = None
+    for operators in OPERATOR_SETS:
+        stats = calc.SearchStats()
+        solved = 0
+        start = time.time()
+        for integers in hands:
+            if calc.solve(integers, stats=stats, operators=operators):
+                solved += 1
+        t = time.time() - start
+        if base is None:
+            base = t
+
+        print('%-16s %10d %10d %5d/%-2d %8.1fms %7.1fx' % (
+                ' '.join(operators) or '+ - * /', stats.states, stats.oprs,
+                solved, n, t * 1e3, t / base))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+'''measure the game server with many concurrent sessions
+
+a server and the clients run in one asyncio loop, each client checks a
+hand, plays some hands (showing the answers) and quits. the sessions and
+lines handled per second are shown
+
+usage: python benchmarks/bench_server.py [clients] [hands]'''
+
+from __future__ import absolute_import, print_function, division
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from game24 import server
+
+
+async def client(port, lines):
+    reader, writer = await asyncio.open_connection('localhost', port)
+    writer.write(''.join(['%s\n' % line for line in lines]).encode('utf-8'))
+    await reader.read()
+    writer.close()
+
+
+async def run(clients, hands):
+    s = server.GameServer()
+    tcp = await s.start('localhost', 0)
+    port = tcp.sockets[0].getsockname()[1]
+    lines = ['c', '3 3 8 8', 'p'] + ['s'] * hands + ['q']
+
+    start = time.time()
+    await asyncio.gather(*[client(port, lines) for i in range(clients)])
+    t = time.time() - start
+
+    tcp.close()
+    await tcp.wait_closed()
+    s.close()
+    return t, clients * len(lines)
+
+
+def main():
+    clients = len(sys.argv) > 1 and int(sys.argv[1]) or 1000
+    hands = len(sys.argv) > 2 and int(sys.argv[2]) or 5
+
+    t, lines = asyncio.run(run(clients, hands))
+    print('%d sessions in %.2fs, %.0f sessions/s, %.0f lines/s' % (
+            clients, t, clients / t, lines / t))
+
+
+if __name__ == '__main__':
+    main()
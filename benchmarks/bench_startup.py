@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+'''measure the startup cost of the 24gameconsole one-shot modes
+
+for every mode, the script reports the wall time of a run and the total
+import time reported by python -X importtime (python 3.7+), the slowest
+imports are listed as well. with --max-ms, it exits with 1 if the import
+time of any mode exceeds the limit, so import regressions can be caught.
+
+usage: python benchmarks/bench_startup.py [-n runs] [--max-ms ms]'''
+
+from __future__ import absolute_import, print_function, division
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+CLI = os.path.join(ROOT, 'game24', '24gameconsole.py')
+
+MODES = (
+    ('solve', ['3', '3', '8', '8']),
+    ('evaluate', ['8/(3-8/3)']),
+)
+
+
+def run(args, importtime=False):
+    env = dict(os.environ)
+    env['PYTHONPATH'] = ROOT + os.pathsep + env.get('PYTHONPATH', '')
+    cmd = [sys.executable]
+    if importtime:
+        cmd.extend(['-X', 'importtime'])
+    cmd.append(CLI)
+    cmd.extend(args)
+    p = subprocess.Popen(cmd, env=env,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    out, err = p.communicate()
+    if p.returncode:
+        raise RuntimeError('%s failed: %s' % (' '.join(cmd), err))
+    return err.decode('utf-8')
+
+
+def parse_importtime(err):
+    '''return total import time in us and the list of (us, module) of
+    top level imports'''
+    total = 0
+    imports = []
+    for line in err.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if name.startswith('  '):
+            # nested import, counted by its parent
+            continue
+        total += int(cumulative)
+        imports.append((int(cumulative), name.strip()))
+    imports.sort(reverse=True)
+    return total, imports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('-n', type=int, default=10, dest='runs')
+    parser.add_argument('--index', dest='index', metavar='FILE',
+            help='also measure the solve mode with the index')
+    parser.add_argument('--max-ms', type=float, dest='max_ms')
+    r = parser.parse_args()
+
+    modes = list(MODES)
+    if r.index:
+        modes.append(('solve-index', ['--index', r.index, '3', '3', '8', '8']))
+
+    failed = False
+    for mode, args in modes:
+        walls = []
+        for i in range(r.runs):
+            start = time.time()
+            run(args)
+            walls.append(time.time() - start)
+        walls.sort()
+
+        total, imports = parse_importtime(run(args, importtime=True))
+        print('%-12s wall %7.1f ms, imports %7.1f ms' %
+                (mode, walls[len(walls) // 2] * 1e3, total / 1e3))
+        for us, name in imports[:5]:
+            print('    %7.1f ms %s' % (us / 1e3, name))
+
+        if r.max_ms is not None and total / 1e3 > r.max_ms:
+            print('    import time exceeds %.1f ms' % r.max_ms)
+            failed = True
+
+    sys.exit(failed and 1 or 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+'''measure the cost of recording hands to the stats store and of
+rebuilding the database from the log
+
+usage: python benchmarks/bench_store.py [records]'''
+
+from __future__ import absolute_import, print_function, division
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from game24 import store
+
+
+def main():
+    n = len(sys.argv) > 1 and int(sys.argv[1]) or 100000
+    rand = random.Random(24)
+    players = ['player%d' % i for i in range(100)]
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        db = os.path.join(tmpdir, 'stats.db')
+        s = store.StatsStore(db)
+
+        start = time.time()
+        for i in range(n):
+            s.record(rand.choice(players),
+                        [rand.randint(1, 13) for j in range(4)], 24,
+                        rand.choice('shf'), rand.random() * 60,
+                        rand.randint(0, 3), start + i)
+        t_record = time.time() - start
+        s.flush()
+        t_flush = time.time() - start
+
+        start = time.time()
+        s.leaderboard()
+        s.hand_stats([3, 3, 8, 8])
+        t_query = time.time() - start
+        s.close()
+
+        start = time.time()
+        store.replay(db + '.log', os.path.join(tmpdir, 'replay.db'))
+        t_replay = time.time() - start
+
+        print('record:  %8.2f us/record (caller)' % (t_record / n * 1e6))
+        print('written: %8.0f records/s' % (n / t_flush))
+        print('queries: %8.2f ms' % (t_query * 1e3))
+        print('replay:  %8.0f records/s' % (n / t_replay))
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
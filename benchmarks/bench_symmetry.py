@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+'''show the work skipped by the symmetry-aware search of calc.solve
+
+for each hand, the pairs picked vs. all pairs, the operations computed
+to new values vs. all operations of the picked pairs, and the Expr
+(and states) built vs. the operations computed, with the solve time
+
+usage: python benchmarks/bench_symmetry.py [integer]...'''
+
+from __future__ import absolute_import, print_function, division
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from game24 import calc
+
+
+HANDS = (
+    [1, 2, 3, 4],
+    [3, 3, 8, 8],
+    [1, 1, 1, 1],
+    [5, 5, 5, 1],
+    [1, 2, 3, 4, 5],
+    [2, 2, 2, 3, 3],
+    [1, 1, 2, 2, 13],
+    [4, 4, 4, 4, 4],
+)
+
+
+def main():
+    hands = HANDS
+    if len(sys.argv) > 1:
+        hands = [[int(s) for s in sys.argv[1:]]]
+
+    print('%-16s %13s %13s %13s %9s' % ('hand', 'pairs', 'operations',
+                                        'exprs', 'time'))
+    for integers in hands:
+        stats = calc.SearchStats()
+        start = time.time()
+        calc.solve(integers, stats=stats)
+        t = time.time() - start
+
+        pairs = stats.pairs + stats.pairs_skipped
+        oprs = stats.oprs + stats.oprs_skipped
+        print('%-16s %6d/%6d %6d/%6d %6d/%6d %7.1fms' % (
+                ' '.join([str(i) for i in integers]),
+                stats.pairs, pairs, stats.oprs, oprs,
+                stats.states, stats.oprs, t * 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+'''stress the calc module from many threads sharing cached answers
+
+the answers of some hands are solved once and shared by all threads.
+each thread solves hands, prints and parses the shared answers, and
+checks they are the same as printed before the threads started. the
+throughput and the mismatches (should be 0) are shown for each number
+of threads
+
+usage: python benchmarks/bench_threads.py [seconds] [threads]...'''
+
+from __future__ import absolute_import, print_function, division
+
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from game24 import calc
+
+
+def worker(cache, expected, seconds, seed, counts):
+    rand = random.Random(seed)
+    hands = sorted(cache)
+    solves = parses = mismatches = 0
+    deadline = time.time() + seconds
+    while time.time() < deadline:
+        integers = rand.choice(hands)
+        answers = calc.solve(list(integers))
+        solves += 1
+        if len(answers) != len(cache[integers]):
+            mismatches += 1
+
+        for expr, s in zip(cache[integers], expected[integers]):
+            parsed = calc.parse(str(expr))
+            parses += 1
+            if (str(expr) != s or parsed.canonical_key() !=
+                    expr.canonical_key()):
+                mismatches += 1
+    counts.append((solves, parses, mismatches))
+
+
+def run(cache, expected, seconds, threads):
+    counts = []
+    workers = [threading.Thread(target=worker,
+                    args=(cache, expected, seconds, i, counts))
+                for i in range(threads)]
+    start = time.time()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    t = time.time() - start
+    solves, parses, mismatches = [sum(c) for c in zip(*counts)]
+    return solves / t, parses / t, mismatches
+
+
+def main():
+    seconds = len(sys.argv) > 1 and float(sys.argv[1]) or 2.0
+    threads = [int(s) for s in sys.argv[2:]] or [1, 2, 4, 8]
+
+    rand = random.Random(24)
+    cache = {}
+    while len(cache) < 200:
+        integers = tuple(sorted([rand.randint(1, 13) for i in range(4)]))
+        cache[integers] = calc.solve(list(integers))
+    expected = dict([(k, [str(expr) for expr in v])
+                        for k, v in cache.items()])
+
+    print('%7s %12s %12s %10s' % ('threads', 'solves/s', 'parses/s',
+                                    'mismatches'))
+    for n in threads:
+        solves, parses, mismatches = run(cache, expected, seconds, n)
+        print('%7d %12.0f %12.0f %10d' % (n, solves, parses, mismatches))
+
+
+if __name__ == '__main__':
+    main()
@@ -5,272 +5,10 @@ from __future__ import absolute_import, print_function, division
 
 import sys
 import argparse
-import readline
-import random
-import traceback
 
-try:
-    import builtins
-    raw_input = getattr(builtins, 'input')
-except ImportError:
-    pass
 
-from game24 import calc, game
-
-
-MSG_MENU_MAIN = '''1. Play (p)
-2. Check answer (c)
-3. Quit (q)'''
-
-MSG_MENU_PLAY = '''1. Definitely no solutions (n)
-2. Give me a hint (h)
-3. I gave up, show me the answer (s)
-4. Back to the main menu (b)
-5. Quit the game (q)'''
-
-MSG_MENU_SET_END = '''1. One more set (n)
-2. Back to the main menu (b)
-3. Quit the game (q)'''
-
-MSG_MENU_PLAY_RIGHT = '''1. Try other solutions (t)
-2. Next hand (n)
-3. Show me the answers (s)
-4. Quit the game (q)'''
-
-MSG_SELECT = 'Your choice: '
-MSG_INVALID_INPUT = 'Invalid input!'
-
-MSG_MENU_HAND_END = '''1. One more hand (n)
-2. Quit this set, back to the main menu (b)
-3. Quit the game (q)'''
-
-MSG_SELECT = 'Your choice: '
-MSG_INVALID_INPUT = 'Invalid input!'
-MSG_INVALID_INTEGER = 'Invalid integer: %s'
-
-MSG_PLAY_NEW_SET = 'Set %d'
-MSG_PLAY_NEW_HAND = 'Hand %d: %s'
-MSG_PLAY_INPUT_EXPR = 'Input your solution or one of the above choices: '
-MSG_PLAY_RIGHT = 'Good Job!'
-MSG_PLAY_FIND_BUG = '''Great Job!
-You not only solved the problem, but also found a bug!
-Please report to me with the cards and your solution if you don't mind.'''
-MSG_PLAY_WRONG = "Sorry! It's not correct!"
-MSG_PLAY_NO_ANSWER = 'Seems no solutions'
-MSG_PLAY_NO_CARDS = 'Set end, your result' 
-
-MSG_INPUT_NUMBERS = 'Please input %d integers: '
-
-INPUT_EOF = '\x00'
-
-
-class GameConsole(game.Game):
-    def __init__(self, target=24, count=4, face2ten=False, showcard=False):
-        super(GameConsole, self).__init__(target, count, face2ten)
-        self.showcard = showcard
-
-    @staticmethod
-    def raw_input_ex(prompt='', default=''):
-        '''enhance raw_input to support default input and also flat EOF'''
-        try:
-            readline.set_startup_hook(lambda: readline.insert_text(default))
-            try:
-                return raw_input(prompt)
-            finally:
-                readline.set_startup_hook()
-
-        except EOFError:
-            return INPUT_EOF
-
-    @staticmethod
-    def print_title(title, dechar='', delen=50):
-        print(dechar * delen)
-        print(title)
-        print(dechar * delen)
-
-    @staticmethod
-    def ui_menu(menu, choices, eof=True):
-        '''show a menu, and return the selection'''
-        GameConsole.print_title(menu, dechar='-')
-        while True:
-            r = GameConsole.raw_input_ex(MSG_SELECT).strip()
-            if r.lower() in choices or (eof and r == INPUT_EOF):
-                print()
-                return r
-            print(MSG_INVALID_INPUT)
-
-    def ui_check_answer(self):
-        '''show answers for user provided integers'''
-        while True:
-            r = self.raw_input_ex(MSG_INPUT_NUMBERS % self.count).strip()
-            try:
-                integers = [int(s) for s in r.strip().split()]
-            except ValueError:
-                print(MSG_INVALID_INPUT)
-                continue
-
-            if len(integers) != self.count:
-                print(MSG_INVALID_INPUT)
-                continue
-            break
-
-        answers = calc.solve(integers, self.target)
-        if answers:
-            s = '\n'.join([str(expr) for expr in answers])
-        else:
-            s = MSG_PLAY_NO_ANSWER
-        self.print_title(s)
-
-    def main(self):
-        '''the main entry of the game console'''
-        choices = '1p2c3q'
-        while True:
-            r = self.ui_menu(MSG_MENU_MAIN, choices)
-            if r in '1p':
-                self.play()
-
-            elif r in '2c':
-                self.ui_check_answer()
-
-            elif r in ('3q' + INPUT_EOF):
-                return
-
-    def print_result(self):
-        solved = 0
-        failed = 0
-        hinted = 0
-        for hand in self.hands:
-            if hand.result == game.HAND_RESULT_SOLVED:
-                solved += 1
-            elif hand.result == game.HAND_RESULT_HINTED:
-                hinted += 1
-            elif hand.result == game.HAND_RESULT_FAILED:
-                failed += 1
-        print()
-        print('Total %d hands solved' % solved)
-        print('Total %d hands solved with hint' % hinted)
-        print('Total %d hands failed to solve' % failed)
-        print()
-
-    def ui_menu_and_expr(self, menu, choices, eof=True):
-        hand_ints = self.hands[-1].integers
-        self.print_title(menu, dechar='-')
-        while True:
-            r = self.raw_input_ex(MSG_PLAY_INPUT_EXPR).strip()
-            if r.lower() in choices or (eof and r == INPUT_EOF):
-                print()
-                return r
-
-            try:
-                expr = calc.parse(r)
-            except ValueError as e:
-                print(str(e))
-                continue
-
-            integers = expr.get_integers()
-            for i in integers:
-                if i not in hand_ints:
-                    print(MSG_INVALID_INTEGER % i)
-                    break
-            else:
-                return expr
-
-    def play(self):
-        while True:
-            if not self.hands:
-                self.print_title(MSG_PLAY_NEW_SET % self.seti, dechar='*')
-
-            hand = self.new_hand()
-            if not hand:
-                # no enough cards for a new hand
-                self.print_title(MSG_PLAY_NO_CARDS, dechar='*')
-                self.print_result()
-
-                choices = '1n2b3q'
-                r = self.ui_menu(MSG_MENU_SET_END, choices)
-                if r in '1n':
-                    # renew the set
-                    self.reset()
-                    continue
-
-                elif r in ('2b' + INPUT_EOF):
-                    # back to the main menu
-                    return
-
-                elif r in '3q':
-                    sys.exit(0)
-
-            print()
-            if self.showcard:
-                sc = hand.str_cards()
-            else:
-                sc = ' '.join([str(i) for i in hand.integers])
-            self.print_title(MSG_PLAY_NEW_HAND % (len(self.hands), sc), 
-                                                            dechar='+')
-            print()
-            while True:
-                choices = '1n2h3s4b5q'
-                r = self.ui_menu_and_expr(MSG_MENU_PLAY, choices)
-                if isinstance(r, calc.Expr):
-                    expr = r
-                    if expr.value == self.target:
-                        hand.solved()
-                        if expr not in hand.answers:
-                            s = MSG_PLAY_FIND_BUG
-                        else:
-                            s = MSG_PLAY_RIGHT
-                        self.print_title(s)
-
-                        choices = '1t2n3s4q'
-                        r = self.ui_menu(MSG_MENU_PLAY_RIGHT, choices, eof=False)
-                        if r in '1t':
-                            continue
-                        elif r in '2n':
-                            break
-                        elif r in '3s':
-                            self.print_title(hand.str_answer())
-                        elif r in '4q':
-                            sys.exit(0)
-
-                    else:
-                        self.print_title(MSG_PLAY_WRONG)
-                        continue
-
-                elif r in '1n':
-                    # no answer
-                    if hand.answers:
-                        self.print_title(MSG_PLAY_WRONG)
-                        continue
-                    else:
-                        hand.solved()
-                        self.print_title(MSG_PLAY_RIGHT)
-
-                elif r in '2h':
-                    # show a hint
-                    if hand.answers:
-                        hand.hinted()
-                        self.print_title(hand.str_hint())
-                        continue
-                    else:
-                        self.print_title(MSG_PLAY_NO_ANSWER)
-
-                elif r in '3s':
-                    # show the answer
-                    if hand.answers:
-                        s = hand.str_answer()
-                    else:
-                        s = MSG_PLAY_NO_ANSWER
-                    self.print_title(s)
-
-                elif r in ('4b' + INPUT_EOF):
-                    # back to the main menu
-                    return
-
-                elif r in '5q':
-                    sys.exit(0)
-
-                # this hand is end
-                break
+MSG_NO_ANSWER = 'Seems no solutions'
+MSG_TRUNCATED = 'Search stopped at the time limit, answers may be missed'
 
 
 def arg_parse():
@@ -281,20 +19,80 @@ def arg_parse():
             help='show cards instead of integers under interactive mode')
     parser.add_argument('-d', action='store_true', dest='debug',
             help='enable debug output')
+    parser.add_argument('--index', dest='index', metavar='FILE',
+            help='look up answers from a precomputed index before solving, '
+                 'see python -m game24.index')
+    parser.add_argument('--file', dest='file', metavar='FILE',
+            help='bulk mode, solve or evaluate each line of the file')
+    parser.add_argument('--format', dest='format', default='tsv',
+            choices=('tsv', 'jsonl'),
+            help='the output format under bulk mode, and of the answers '
+                 '(one per line or a JSON array), default=tsv')
     parser.add_argument('-i', action='store_true', dest='interactive',
             help='interactive mode, all positional integers arguments omitted')
+    parser.add_argument('-j', type=int, default=1, dest='jobs',
+            help='the number of worker processes under bulk mode, default=1')
+    parser.add_argument('--profile', nargs='?', const='24game.prof',
+            dest='profile', metavar='OUT',
+            help='profile any mode, write the pstats to OUT and the '
+                 'collapsed stacks to OUT.collapsed, and show the time of '
+                 'the spans, default OUT=24game.prof (use --profile=OUT)')
+    parser.add_argument('--profiler', dest='profiler', default='cprofile',
+            choices=('cprofile', 'sample'),
+            help='the profiler used by --profile, sample only writes the '
+                 'collapsed stacks with less overhead, default=cprofile')
+    parser.add_argument('--max-numerator', type=int, dest='max_numerator',
+            metavar='N',
+            help='drop the intermediate values beyond N (absolute) while '
+                 'solving, faster for large integers or targets but the '
+                 'answers only computed through them are missed')
+    parser.add_argument('--max-denominator', type=int,
+            dest='max_denominator', metavar='N',
+            help='drop the intermediate fractions with denominators beyond N '
+                 'while solving, see --max-numerator')
     parser.add_argument('-N', action='store_true', dest='face2ten',
             help='under interactive mode, set J Q K to 10, default=11,12,13')
+    parser.add_argument('--operators', dest='operators', metavar='OPRS',
+            type=lambda s: [o for o in s.split(',') if o],
+            help='solve with the extra operators besides + - * /, comma '
+                 'separated from ^ ! sqrt |, like --operators ^,!')
+    parser.add_argument('--player', dest='player',
+            help='the player name recorded with --stats, default=login name')
+    parser.add_argument('--seed', type=int, dest='seed',
+            help='under interactive mode, deal the same hands every run '
+                 'with the seed, default=random')
+    parser.add_argument('--stats', dest='stats', metavar='FILE',
+            help='record the played hands to the SQLite database under '
+                 'interactive mode, see python -m game24.store')
+    parser.add_argument('--style', dest='style', default='unicode',
+            choices=('unicode', 'ascii', 'rpn'),
+            help='the style of the answers, with × ÷, with * / or in '
+                 'reverse polish notation, default=unicode')
+    parser.add_argument('--stdin', action='store_true', dest='stdin',
+            help='bulk mode, solve or evaluate each line of the stdin')
     parser.add_argument('-t', type=int, default=24, dest='target',
             help='the game target, default=24')
+    parser.add_argument('--timeout', type=float, dest='timeout',
+            metavar='SECONDS',
+            help='stop searching answers of a hand after the seconds, '
+                 'also of each hand under bulk mode, the answers checked '
+                 'under interactive mode stop after 10 seconds by default')
     parser.add_argument('integers', nargs='*')
 
     r = parser.parse_args()
 
-    if not r.interactive and len(r.integers) == 0:
+    r.bounds = None
+    if r.max_numerator is not None or r.max_denominator is not None:
+        r.bounds = (r.max_numerator, r.max_denominator)
+
+    r.bulk = r.stdin or r.file
+    if r.bulk and (r.interactive or r.integers):
+        parser.error('no integers or expression expected under bulk mode')
+
+    if not r.bulk and not r.interactive and len(r.integers) == 0:
         r.interactive = True
 
-    elif not r.interactive and len(r.integers) != 1:
+    elif not r.bulk and not r.interactive and len(r.integers) != 1:
         if len(r.integers) != r.count:
             parser.error('invalid number of integers provided, expect %d' % 
                                                                     r.count)
@@ -313,30 +111,84 @@ def arg_parse():
     return r
 
 
+def solve_strs(args):
+    '''return the answer strings of the hand given by args, the modules
+    are imported only when needed to keep the one-shot modes fast'''
+    if (args.index and not args.debug and args.style == 'unicode' and
+            not args.operators and args.bounds is None):
+        # the index keeps the answers in the default style
+        from game24 import index
+        answers = index.lookup(args.index, args.integers, args.target)
+        if answers is not None:
+            return answers
+
+    from game24 import calc
+    bounds = args.bounds and calc.Bounds(*args.bounds)
+    exprs = calc.solve(args.integers, args.target, args.timeout,
+                        operators=args.operators, bounds=bounds)
+    if exprs.truncated:
+        print(MSG_TRUNCATED, file=sys.stderr)
+    return [args.debug and repr(expr) or expr.format(args.style)
+                for expr in exprs]
+
+
 def main():
     args = arg_parse()
+    if args.profile:
+        from game24 import tracing
+        tracing.run(run, args, args.profile, args.profiler)
+    else:
+        run(args)
+
+
+def run(args):
     try:
         if args.interactive:
+            from game24.console import GameConsole
+            store = None
+            player = args.player
+            if args.stats:
+                import getpass
+                from game24.store import StatsStore
+                store = StatsStore(args.stats)
+                player = player or getpass.getuser()
             gc = GameConsole(args.target, args.count, 
-                        args.face2ten, args.showcard)
+                        args.face2ten, args.showcard, args.timeout,
+                        store, player, args.seed)
             gc.main()
 
+        elif args.bulk:
+            from game24 import batch, calc
+            bounds = args.bounds and calc.Bounds(*args.bounds)
+            if args.stdin:
+                batch.run(sys.stdin, sys.stdout, args.target, args.format,
+                            args.jobs, args.index, args.style, args.timeout,
+                            args.operators, bounds)
+            else:
+                with open(args.file) as f:
+                    batch.run(f, sys.stdout, args.target, args.format,
+                            args.jobs, args.index, args.style, args.timeout,
+                            args.operators, bounds)
+
         elif len(args.integers) == 1:
             # parse expression
+            from game24 import calc
             expr = calc.parse(args.integers[0])
             if args.debug:
                 print(repr(expr))
-                print(str(expr))
+                print(expr.format(args.style))
             print(expr.value)
 
         else:
             # solve
-            exprs = calc.solve(args.integers, args.target)
-            if not exprs:
-                print(MSG_PLAY_NO_ANSWER)
+            answers = solve_strs(args)
+            if args.format == 'jsonl':
+                from game24 import batch
+                batch.write_answers(sys.stdout, answers, args.format)
+            elif not answers:
+                print(MSG_NO_ANSWER)
             else:
-                for expr in exprs:
-                    print(args.debug and repr(expr) or str(expr))
+                print('\n'.join(answers))
 
         sys.exit(0)
 
@@ -345,6 +197,7 @@ def main():
 
     except Exception as e:
         if args.debug:
+            import traceback
             traceback.print_exc()
         else:
             print(str(e), file=sys.stderr)
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+'''solve hands or evaluate expressions in bulk, one per line
+
+a line of two or more integers is a hand to solve, any other line is an
+expression to evaluate. a result is written for each line in the same
+order, either as TSV:
+    <line> TAB <answer> [TAB <answer>]...   (a hand)
+    <line> TAB <value>                      (an expression)
+    <line> TAB ! <error>                    (an invalid line)
+or as JSON lines with the keys input, answers / value / error.
+the answers are written in one of the styles of calc.Expr.format.
+a hand whose search stopped at the timeout may miss answers, its TSV line
+ends with a ... field, and its JSON line has truncated: true.'''
+
+from __future__ import absolute_import, print_function, division
+
+import json
+import itertools
+
+from . import calc
+from .index import SolutionIndex, hand_key
+
+FORMAT_TSV = 'tsv'
+FORMAT_JSONL = 'jsonl'
+
+TSV_TRUNCATED = '...'
+
+CHUNK_SIZE = 1000
+EXPR_CACHE_SIZE = 100000
+
+
+class ResultCache(object):
+    '''answers of hands keyed by the index key (shared with SolutionIndex,
+    so a loaded index warms the cache), and values of expressions.
+    the index keeps the answers in the default style, those in the other
+    styles are kept by the cache.
+    a hand is searched for timeout seconds at most, the answers of a
+    stopped search have the truncated flag set and are not cached.
+    with the extra operators or the bounds (see calc.solve), the index (of
+    + - * / without bounds) isn't used, the answers are kept by the cache'''
+    def __init__(self, index=None, style=calc.STYLE_UNICODE, timeout=None,
+                    operators=None, bounds=None):
+        self.index = index or SolutionIndex()
+        self.style = style
+        self.timeout = timeout
+        self.operators = operators
+        self.bounds = bounds
+        # the answers of the index are of the options
+        self.indexed = not operators and bounds is None
+        self.styled = {}
+        self.values = {}
+
+    def solve(self, integers, target):
+        return calc.solve(integers, target, self.timeout,
+                            operators=self.operators, bounds=self.bounds)
+
+    def answers(self, integers, target):
+        if self.style != calc.STYLE_UNICODE or not self.indexed:
+            return self.styled_answers(integers, target)
+
+        answers = self.index.get(integers, target)
+        if answers is None:
+            exprs = self.solve(integers, target)
+            answers = calc.Solutions([str(e) for e in exprs])
+            answers.truncated = exprs.truncated
+            if not answers.truncated:
+                self.index.add(integers, target, answers)
+        return answers
+
+    def styled_answers(self, integers, target):
+        key = hand_key(integers, target)
+        answers = self.styled.get(key)
+        if answers is None:
+            exprs = self.indexed and self.index.get(integers, target) or None
+            if exprs is None:
+                exprs = self.solve(integers, target)
+            else:
+                exprs = [calc.parse(s) for s in exprs]
+            answers = calc.Solutions([expr.format(self.style)
+                                        for expr in exprs])
+            answers.truncated = getattr(exprs, 'truncated', False)
+            if not answers.truncated:
+                self.styled[key] = answers
+        return answers
+
+    def value(self, s):
+        try:
+            return self.values[s]
+        except KeyError:
+            pass
+
+        value = calc.parse(s).value
+        if len(self.values) >= EXPR_CACHE_SIZE:
+            self.values.clear()
+        self.values[s] = value
+        return value
+
+
+def process_line(line, target, cache):
+    '''return a dict of the result of a line'''
+    line = line.strip()
+    tokens = line.split()
+    try:
+        if len(tokens) > 1 and all([t.isdigit() for t in tokens]):
+            integers = [int(t) for t in tokens]
+            answers = cache.answers(integers, target)
+            result = {'input': line, 'answers': list(answers)}
+            if getattr(answers, 'truncated', False):
+                result['truncated'] = True
+            return result
+
+        value = cache.value(line)
+        return {'input': line, 'value': value is not None and str(value)
+                                        or None}
+
+    except ValueError as e:
+        return {'input': line, 'error': str(e)}
+
+
+def write_answers(out, answers, fmt=FORMAT_TSV, style=calc.STYLE_UNICODE):
+    '''write the answers (Expr or strings) of a hand to the stream out in
+    one write, one per line (FORMAT_TSV) or as a JSON array (FORMAT_JSONL)'''
+    answers = [isinstance(a, calc.BaseNumber) and a.format(style) or a
+                for a in answers]
+    if fmt == FORMAT_JSONL:
+        out.write(json.dumps(answers, ensure_ascii=False) + '\n')
+    elif answers:
+        out.write('\n'.join(answers) + '\n')
+
+
+def format_result(result, fmt=FORMAT_TSV):
+    if fmt == FORMAT_JSONL:
+        return json.dumps(result, ensure_ascii=False)
+
+    if 'answers' in result:
+        fields = result['answers']
+        if result.get('truncated'):
+            fields = fields + [TSV_TRUNCATED]
+    elif 'value' in result:
+        fields = [str(result['value'])]
+    else:
+        fields = ['! ' + result['error']]
+    return '\t'.join([result['input']] + fields)
+
+
+_cache = None
+
+def _init_worker(index_path, style=calc.STYLE_UNICODE, timeout=None,
+                    operators=None, bounds=None):
+    global _cache
+    index = index_path and SolutionIndex().load(index_path) or None
+    _cache = ResultCache(index, style, timeout, operators, bounds)
+
+
+def _process_chunk(args):
+    lines, target, fmt = args
+    return '\n'.join([format_result(process_line(line, target, _cache), fmt)
+                                    for line in lines])
+
+
+def chunks(lines, size=CHUNK_SIZE):
+    lines = (line for line in lines if line.strip())
+    while True:
+        chunk = list(itertools.islice(lines, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run(lines, out, target=24, fmt=FORMAT_TSV, jobs=1, index_path=None,
+        style=calc.STYLE_UNICODE, timeout=None, operators=None,
+        bounds=None):
+    '''process the lines and write the results to the stream out, a chunk
+    of results is written at a time. with jobs > 1, the chunks are
+    processed by a pool of worker processes each with its own cache.
+    timeout is of the search of each hand, operators are the extra
+    operators and bounds the calc.Bounds to solve the hands with, see
+    ResultCache'''
+    # an invalid operator fails the run rather than each line
+    calc.get_operators(operators)
+    tasks = ((chunk, target, fmt) for chunk in chunks(lines))
+
+    if jobs > 1:
+        import multiprocessing
+        pool = multiprocessing.Pool(jobs, _init_worker,
+                            (index_path, style, timeout, operators, bounds))
+        try:
+            for s in pool.imap(_process_chunk, tasks):
+                out.write(s + '\n')
+        finally:
+            pool.terminate()
+    else:
+        _init_worker(index_path, style, timeout, operators, bounds)
+        for task in tasks:
+            out.write(_process_chunk(task) + '\n')
+    out.flush()
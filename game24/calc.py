@@ -2,8 +2,31 @@
 
 from __future__ import absolute_import, print_function, division
 
+import bisect
+import itertools
+import time
+from array import array
 from fractions import Fraction
 
+try:
+    from math import gcd
+except ImportError:
+    from fractions import gcd
+
+try:
+    from math import isqrt
+except ImportError:
+    def isqrt(n):
+        # Newton's method on integers
+        if n < 2:
+            return n
+        x = 1 << ((n.bit_length() + 1) // 2)
+        while True:
+            y = (x + n // x) // 2
+            if y >= x:
+                return x
+            x = y
+
 try:
     import __builtin__
     cmp = getattr(__builtin__, 'cmp')
@@ -14,6 +37,12 @@ def opr_py2math(opr):
     return opr == '*' and '×' or (opr == '/' and '÷' or opr)
 
 
+STYLE_UNICODE = 'unicode'
+STYLE_ASCII = 'ascii'
+STYLE_RPN = 'rpn'
+STYLES = (STYLE_UNICODE, STYLE_ASCII, STYLE_RPN)
+
+
 def opr2uni(opr):
     return opr in '+-' and '+' or '*'
 
@@ -24,6 +53,7 @@ def opr2orig(uni_opr, reverse=True):
 
 class BaseNumber(object):
     _index = 0
+    _key = None
     def __init__(self, value):
         self.value = value
 
@@ -33,23 +63,41 @@ class BaseNumber(object):
     def __str__(self):
         return str(self.value)
 
-    def _detail_cmp(self, other):
-        return self.value - other.value
+    def format(self, style=STYLE_UNICODE):
+        return str(self)
+
+    def formats(self, styles=STYLES):
+        s = str(self)
+        return [s] * len(styles)
+
+    def get_integers(self):
+        return [self.value]
+
+    def hint_chain(self):
+        return []
+
+    def canonical_key(self):
+        if self._key is None:
+            self._key = (self._index, self.value)
+        return self._key
 
     def __cmp__(self, other):
-        c = self._index - other._index
-        if c:
-            return c
-        return self._detail_cmp(other)
+        return cmp(self.canonical_key(), other.canonical_key())
 
     def __lt__(self, other):
-        return self.__cmp__(other) < 0
+        return self.canonical_key() < other.canonical_key()
 
     def __gt__(self, other):
-        return self.__cmp__(other) > 0
+        return self.canonical_key() > other.canonical_key()
 
     def __eq__(self, other):
-        return self.__cmp__(other) == 0
+        return self.canonical_key() == other.canonical_key()
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(self.canonical_key())
 
 
 class Number(BaseNumber):
@@ -70,33 +118,33 @@ class Rand(object):
     def __str__(self):
         return repr(self)
 
-    def __cmp__(self, other):
-        if self.reverse != other.reverse:
-            return self.reverse and 1 or -1
-
-        elif type(self.number) != type(other.number):
-            # Number comes before Expr
-            return self.number._index - other.number._index
+    def key(self):
+        # non reversed rands come first, then Number before Expr
+        return (self.reverse, self.number.canonical_key())
 
-        else:
-            return self.number.__cmp__(other.number)
+    def __cmp__(self, other):
+        return cmp(self.key(), other.key())
 
     def __lt__(self, other):
-        return self.__cmp__(other) < 0
+        return self.key() < other.key()
 
     def __gt__(self, other):
-        return self.__cmp__(other) > 0
+        return self.key() > other.key()
 
     def __eq__(self, other):
-        return self.__cmp__(other) == 0
+        return self.key() == other.key()
 
 
 class Expr(BaseNumber):
     '''An arithmatic expression with an operator and multi operands.
     self.opr is the unified operator (either + or *)
-    self.rands is a list of Rand'''
+    self.rands is a list of Rand, kept sorted by set_value.
+    an expr is only changed (by add and extend) while it's being built,
+    after that all the methods are read only (the cached key and strings
+    are computed the same by any thread), so the answers can be shared
+    across threads'''
     _index = 2
-
+    _strs = None
 
     def __init__(self, opr):
         self.opr = opr
@@ -105,13 +153,21 @@ class Expr(BaseNumber):
         self._value = 0
 
     def set_value(self):
+        self._key = None
+        self._strs = None
         if self.rands:
-            self.rands.sort()
+            # a new list, the old one may be iterated by another reader
+            self.rands = sorted(self.rands, key=Rand.key)
             assert(not self.rands[0].reverse)
             self._value = self.rands[0].number.value
 
         for rand in self.rands[1:]:
-            if self.opr == '+' and not rand.reverse:
+            if self._value is None or rand.number.value is None:
+                # a division by zero, or an operator out of its guards
+                self._value = None
+                break
+
+            elif self.opr == '+' and not rand.reverse:
                 self._value += rand.number.value
 
             elif self.opr == '+' and rand.reverse:
@@ -157,72 +213,478 @@ class Expr(BaseNumber):
     def str_hint(self):
         # return a string of (x opr y)
         for rand in self.rands:
-            if isinstance(rand.number, Expr):
+            if not isinstance(rand.number, Number):
                 return rand.number.str_hint()
         else:
             return ('%s %s %s' % (str(self.rands[0].number), 
                 opr2orig(self.opr, self.rands[1].reverse), 
                 str(self.rands[1].number)))
 
+    def hint_chain(self):
+        '''the steps to compute the expr, each step is the string of one
+        more operation, the first step is the pair of str_hint and the last
+        one is the expr itself'''
+        steps = []
+        for rand in self.rands:
+            steps.extend(rand.number.hint_chain())
+        for i in range(2, len(self.rands) + 1):
+            steps.append(self._str_rands(self.rands[:i]))
+        return steps
+
     def get_integers(self):
         # return integers that composed the expr
         ints = []
         for rand in self.rands:
-            if isinstance(rand.number, Expr):
-                ints.extend(rand.number.get_integers())
-            else:
-                ints.append(rand.number.value)
+            ints.extend(rand.number.get_integers())
         return ints
 
     def __repr__(self):
         return '<%s %s>' % (self.opr, repr(self.rands))
 
     def __str__(self):
-        self.rands.sort()
+        return self.format(STYLE_UNICODE)
+
+    def format(self, style=STYLE_UNICODE):
+        '''return the string of the expr in the style, it's memoized'''
+        strs = self._strs
+        if strs is None or style not in strs:
+            return self.formats((style,))[0]
+        return strs[style]
+
+    def formats(self, styles=STYLES):
+        '''return the strings of the expr in the styles: STYLE_UNICODE
+        (the default, with × and ÷), STYLE_ASCII (with * and /) or STYLE_RPN
+        (reverse polish notation), all in a single walk of the tree.
+        the parentheses are minimal, as the rands of an expr with + or -
+        are never exprs of + or -, only those of * and / need them'''
+        if self._strs is None:
+            self._strs = {}
+        strs = self._strs
+        missed = [style for style in styles if style not in strs]
+        if missed:
+            for style, s in zip(missed, self._format_rands(self.rands,
+                                                            missed)):
+                strs[style] = s
+        return [strs[style] for style in styles]
+
+    def _format_rands(self, rands, styles):
+        parens = self.opr == '*'
+        parts = [[] for style in styles]
+        children = [rand.number.formats(styles) for rand in rands]
+        for i, rand in enumerate(rands):
+            opr = opr2orig(self.opr, rand.reverse)
+            nested = parens and isinstance(rand.number, Expr)
+            for style, part, s in zip(styles, parts, children[i]):
+                if style == STYLE_RPN:
+                    part.append(s)
+                    if i:
+                        part.append(opr)
+                    continue
 
-        s = ''
-        for rand in self.rands:
-            rs = str(rand.number)
-            if isinstance(rand.number, Expr) and self.opr == '*':
-                rs = '(%s)' % rs
+                if i:
+                    part.append(style == STYLE_UNICODE and opr_py2math(opr)
+                                    or opr)
+                part.append(nested and '(%s)' % s or s)
+        return [' '.join(part) for part in parts]
+
+    def _str_rands(self, rands):
+        return self._format_rands(rands, (STYLE_UNICODE,))[0]
+
+    def canonical_key(self):
+        '''the key orders exprs by operator, then the number of rands,
+        then the sorted rands, it is cached until the expr is changed'''
+        if self._key is None:
+            rand_keys = sorted([rand.key() for rand in self.rands])
+            self._key = (self._index, self.opr, len(rand_keys),
+                            tuple(rand_keys))
+        return self._key
+
+
+def canonical_key(number):
+    '''return a compact hashable key of an expression (or the string of
+    an expression), two expressions have the same key if and only if they
+    are the same after unifying - to + and / to *, and sorting the operands'''
+    if not isinstance(number, BaseNumber):
+        number = parse(number)
+    return number.canonical_key()
+
+
+FIXITY_PREFIX = 'prefix'
+FIXITY_POSTFIX = 'postfix'
+FIXITY_INFIX = 'infix'
+
+# the guards of the operators, to prune huge or inexact numbers early
+MAX_MAGNITUDE = 10 ** 6
+MAX_EXPONENT = 20
+MAX_FACTORIAL = 10
+# the number of unary operators applied in a row, like √(3!)
+MAX_UNARY_NESTING = 2
+
+
+def is_integer(value):
+    return value is not None and (isinstance(value, int) or
+                                    value == int(value))
+
+
+def in_magnitude(value):
+    value = Fraction(value)
+    return (abs(value.numerator) <= MAX_MAGNITUDE and
+            value.denominator <= MAX_MAGNITUDE)
+
+
+class Operator(object):
+    '''an operator besides + - * /, applied by a FuncExpr.
+    symbol is used in the unicode style, ascii in the ascii and rpn styles
+    and both are accepted by parse. the prefix and postfix operators are
+    unary, the infix ones are binary, all of them take precedence over
+    + - * /. value returns None if the operands are out of the guards'''
+    name = None
+    symbol = None
+    ascii = None
+    fixity = FIXITY_INFIX
+    right_assoc = False
 
-            if not s:
-                s = rs
-            else:
-                opr = opr_py2math(opr2orig(self.opr, rand.reverse))
-                s = '%s %s %s' % (s, opr, rs)
-        return s
+    @property
+    def arity(self):
+        return self.fixity == FIXITY_INFIX and 2 or 1
 
-    def _detail_cmp(self, other):
-        if self.opr != other.opr:
-            return ord(self.opr) - ord(other.opr)
+    def format_symbol(self, style=STYLE_UNICODE):
+        '''the symbol of the operator in the style'''
+        return style == STYLE_UNICODE and self.symbol or self.ascii
 
-        elif len(self.rands) != len(other.rands):
-            return len(self.rands) - len(other.rands)
+    def value(self, *values):
+        raise NotImplementedError()
 
-        else:
-            self.rands.sort()
-            other.rands.sort()
+    def accepts(self, *numbers):
+        '''check if the operator applies to the numbers by their forms'''
+        return True
 
-            for i in range(len(self.rands)):
-                c = self.rands[i].__cmp__(other.rands[i])
-                if c:
-                    return c
-            return 0
 
+class Power(Operator):
+    name = '^'
+    symbol = '^'
+    ascii = '^'
+    right_assoc = True
 
-def expr_create(left, opr, right):
-    if opr in ('+', '*'):
-        expr = Expr(opr)
-        if isinstance(left, Number) or left.opr != opr:
-            expr.add(left)
-        else:
-            expr.extend(left)
+    def value(self, x, y):
+        if not is_integer(y) or abs(y) > MAX_EXPONENT or (x == 0 and y < 0):
+            return None
+        x, y = Fraction(x), int(y)
+        # check the magnitude before computing a huge power
+        if (abs(x.numerator) > 1 or x.denominator > 1) and y not in (0, 1):
+            if max(abs(x.numerator), x.denominator) ** abs(y) > MAX_MAGNITUDE:
+                return None
+        value = x ** y
+        return value.denominator == 1 and int(value) or value
+
+
+class Factorial(Operator):
+    name = '!'
+    symbol = '!'
+    ascii = '!'
+    fixity = FIXITY_POSTFIX
+
+    def value(self, x):
+        if not is_integer(x) or x < 0 or x > MAX_FACTORIAL:
+            return None
+        value = 1
+        for i in range(2, int(x) + 1):
+            value *= i
+        return value
+
+
+class SquareRoot(Operator):
+    name = 'sqrt'
+    symbol = u'√'
+    ascii = 'sqrt'
+    fixity = FIXITY_PREFIX
+
+    def value(self, x):
+        # only the exact roots
+        x = Fraction(x)
+        if x < 0:
+            return None
+        n, d = isqrt(x.numerator), isqrt(x.denominator)
+        if n * n != x.numerator or d * d != x.denominator:
+            return None
+        return d == 1 and n or Fraction(n, d)
+
+
+class Concatenation(Operator):
+    '''the digits of the cards written together, like 1|2 = 12, only the
+    cards (or cards concatenated) are concatenated, on the left'''
+    name = '|'
+    symbol = '|'
+    ascii = '|'
+
+    def value(self, x, y):
+        if not is_integer(x) or not is_integer(y) or x <= 0 or y < 0:
+            return None
+        return int('%d%d' % (int(x), int(y)))
+
+    def accepts(self, x, y):
+        return isinstance(y, Number) and (isinstance(x, Number) or
+                    (isinstance(x, FuncExpr) and x.operator is self))
+
+
+# the name -> Operator of the operators that parse, FuncExpr and
+# solve(operators=...) accept
+OPERATOR_REGISTRY = {}
+
+
+# the characters parse reads besides the operators of the registry
+PARSE_CHARS = ('(', ')', '+', '-', '*', '/')
+# the characters never in an expression, as the separators of the text
+# formats of the answers (like the index file)
+RESERVED_CHARS = (';', '\t')
+
+# the symbols of the registry which aren't words, the longest first, as
+# TokenReader matches them
+_operator_symbols = []
+
+
+def register_operator(operator):
+    '''add an Operator to the registry, its symbols must be unique, and
+    each is either a word (like sqrt) or has no letters (like ^ or **),
+    without digits, spaces, the characters of + - * / ( ) and
+    RESERVED_CHARS'''
+    symbols = set([operator.symbol, operator.ascii])
+    for symbol in symbols:
+        if (not symbol or not (symbol.isalpha() or
+                    not [c for c in symbol if c.isalpha() or c.isdigit() or
+                            c.isspace() or c in PARSE_CHARS or
+                            c in RESERVED_CHARS])):
+            raise ValueError('Invalid operator symbol: %s' % symbol)
+
+    for other in OPERATOR_REGISTRY.values():
+        if set([other.symbol, other.ascii]) & symbols:
+            raise ValueError('Duplicated operator symbol: %s' %
+                                operator.symbol)
+    OPERATOR_REGISTRY[operator.name] = operator
+    _update_symbols()
+    return operator
+
+
+def unregister_operator(name):
+    '''remove the operator of the name from the registry'''
+    del OPERATOR_REGISTRY[name]
+    _update_symbols()
 
-        if isinstance(right, Number) or right.opr != opr:
-            expr.add(right)
+
+def _update_symbols():
+    symbols = set()
+    for operator in OPERATOR_REGISTRY.values():
+        symbols.update([symbol for symbol in (operator.symbol, operator.ascii)
+                        if not symbol.isalpha()])
+    _operator_symbols[:] = sorted(symbols, key=len, reverse=True)
+
+
+for _operator in (Power(), Factorial(), SquareRoot(), Concatenation()):
+    register_operator(_operator)
+
+
+def get_operators(names):
+    '''return the Operators of the names (or symbols) from the registry'''
+    operators = []
+    for name in names or ():
+        for operator in OPERATOR_REGISTRY.values():
+            if name in (operator.name, operator.symbol, operator.ascii):
+                operators.append(operator)
+                break
         else:
-            expr.extend(right)
+            raise ValueError('Invalid operator: %s' % name)
+    return operators
+
+
+def symbol_operator(symbol):
+    '''return the Operator of a symbol (unicode or ascii), or None'''
+    for operator in OPERATOR_REGISTRY.values():
+        if symbol in (operator.symbol, operator.ascii):
+            return operator
+    return None
+
+
+class FuncExpr(BaseNumber):
+    '''an operator of the registry applied to its operands (numbers)'''
+    _index = 3
+    _strs = None
+
+    def __init__(self, operator, operands, value):
+        self.operator = operator
+        self.operands = tuple(operands)
+        self.value = value
+        # the number of unary operators applied in a row
+        self.nesting = 0
+        if operator.arity == 1:
+            self.nesting = getattr(operands[0], 'nesting', 0) + 1
+
+    def __repr__(self):
+        return '<%s %s>' % (self.operator.name, repr(list(self.operands)))
+
+    def __str__(self):
+        return self.format(STYLE_UNICODE)
+
+    def canonical_key(self):
+        if self._key is None:
+            self._key = (self._index, self.operator.name, len(self.operands),
+                        tuple([n.canonical_key() for n in self.operands]))
+        return self._key
+
+    def format(self, style=STYLE_UNICODE):
+        strs = self._strs
+        if strs is None or style not in strs:
+            return self.formats((style,))[0]
+        return strs[style]
+
+    def formats(self, styles=STYLES):
+        '''the strings in the styles in one walk, see Expr.formats.
+        an operand is in parentheses only if parse needs them, see
+        operand_parens'''
+        if self._strs is None:
+            self._strs = {}
+        strs = self._strs
+        missed = [style for style in styles if style not in strs]
+        if missed:
+            operator = self.operator
+            children = [n.formats(missed) for n in self.operands]
+            for i, style in enumerate(missed):
+                operands = [c[i] for c in children]
+                if style == STYLE_RPN:
+                    strs[style] = ' '.join(operands + [operator.ascii])
+                    continue
+
+                symbol = operator.format_symbol(style)
+                operands = [self.operand_parens(j, style) and '(%s)' % c or c
+                            for j, c in enumerate(operands)]
+                if operator.fixity == FIXITY_PREFIX and symbol.isalpha():
+                    # sqrt(9) rather than sqrt9
+                    strs[style] = '%s(%s)' % (symbol, children[0][i])
+                elif operator.fixity == FIXITY_PREFIX:
+                    strs[style] = symbol + operands[0]
+                elif operator.fixity == FIXITY_POSTFIX:
+                    strs[style] = operands[0] + symbol
+                else:
+                    strs[style] = symbol.join(operands)
+        return [strs[style] for style in styles]
+
+    def operand_parens(self, i, style=STYLE_UNICODE):
+        '''check if the i-th operand needs parentheses in the style.
+        the operators of the registry bind tighter than + - * /, a prefix
+        operator applies to the operand with its postfix operators (√9! is
+        √(9!)) unless the operand is in parentheses (like sqrt(4)! is
+        (sqrt 4)!), and the infix operators are of the same precedence, so
+        a chain is grouped by the associativity of its operators'''
+        n = self.operands[i]
+        if isinstance(n, Number):
+            return False
+        elif not isinstance(n, FuncExpr):
+            return True
+
+        fixity = self.operator.fixity
+        if fixity == FIXITY_POSTFIX:
+            return (n.operator.fixity != FIXITY_POSTFIX and
+                    not (n.operator.fixity == FIXITY_PREFIX and
+                            n.operator.format_symbol(style).isalpha()))
+        elif fixity == FIXITY_PREFIX:
+            if n.operator.fixity == FIXITY_INFIX:
+                return True
+            # √((2 + 7)!) rather than √(2 + 7)!, which is (√(2 + 7))!
+            while n.operator.fixity == FIXITY_POSTFIX:
+                if n.operand_parens(0, style):
+                    return True
+                n = n.operands[0]
+                if not isinstance(n, FuncExpr):
+                    break
+            return False
+        elif n.operator.fixity != FIXITY_INFIX:
+            return False
+        elif i == 0:
+            return n.operator.right_assoc
+        return not self.operator.right_assoc
+
+    def get_integers(self):
+        ints = []
+        for n in self.operands:
+            ints.extend(n.get_integers())
+        return ints
+
+    def hint_chain(self):
+        steps = []
+        for n in self.operands:
+            steps.extend(n.hint_chain())
+        steps.append(str(self))
+        return steps
+
+    def str_hint(self):
+        return self.hint_chain()[0]
+
+
+def func_value(operator, numbers):
+    '''return the value of the operator applied to the numbers, or None if
+    it's out of the guards'''
+    if (any([n.value is None for n in numbers]) or
+            not operator.accepts(*numbers)):
+        return None
+    value = operator.value(*[n.value for n in numbers])
+    if value is None or not in_magnitude(value):
+        return None
+    return value
+
+
+def func_create(operator, *numbers):
+    '''return the FuncExpr of the operator applied to the numbers, or None
+    if it's out of the guards or too many unary operators are nested'''
+    if (operator.arity == 1 and
+            getattr(numbers[0], 'nesting', 0) >= MAX_UNARY_NESTING):
+        return None
+    value = func_value(operator, numbers)
+    if value is None:
+        return None
+    return FuncExpr(operator, numbers, value)
+
+
+def func_operators(expr):
+    '''return the set of the names of the operators of the registry used
+    anywhere in the expr'''
+    if isinstance(expr, FuncExpr):
+        names = set([expr.operator.name])
+        numbers = expr.operands
+    elif isinstance(expr, Expr):
+        names = set()
+        numbers = [rand.number for rand in expr.rands]
+    else:
+        return set()
+    for n in numbers:
+        names.update(func_operators(n))
+    return names
+
+
+OPERATORS =('+', '-', '*', '/', 'r/')
+
+
+def opr_value(x, opr, y):
+    '''return the value of expr_create(x, opr, y) computed with the values
+    only, or None if the expr can't be created'''
+    if opr == '+':
+        return x + y
+    elif opr == '-':
+        return abs(x - y)
+    elif opr == '*':
+        return x * y
+    elif opr == 'r/':
+        x, y = y, x
+
+    if y == 0:
+        return None
+    return Fraction(x, y)
+
+
+def expr_rands(left, opr, right):
+    '''return the unified operator and the list of (number, reverse) as the
+    rands of expr_create(left, opr, right), or None if it can't be created'''
+    if opr in ('+', '*'):
+        uni_opr = opr
+        reverse = False
 
     else:
         if (opr == '-' and left.value < right.value) or opr == 'r/':
@@ -231,28 +693,65 @@ def expr_create(left, opr, right):
         uni_opr = opr == '-' and '+' or '*'
         if uni_opr == '*' and right.value == 0:
             return None
+        reverse = True
 
-        expr = Expr(uni_opr)
-        if isinstance(left, Number) or left.opr != uni_opr:
-            expr.add(left)
+    rands = []
+    for number, rev in ((left, False), (right, reverse)):
+        if isinstance(number, Expr) and number.opr == uni_opr:
+            rands.extend([(rand.number, rand.reverse != rev)
+                            for rand in number.rands])
         else:
-            expr.extend(left)
+            rands.append((number, rev))
 
-        if isinstance(right, Number) or right.opr != uni_opr:
-            expr.add(right, reverse=True)
-        else:
-            expr.extend(right, reverse=True)
+    # x / 1 is unified to x * 1, x - 0 unified to x + 0
+    unit = uni_opr == '*' and 1 or 0
+    return uni_opr, [(number, rev and number.value != unit)
+                        for number, rev in rands]
+
+
+def rands_key(uni_opr, rands):
+    '''the canonical key of the expr of the rands from expr_rands'''
+    rand_keys = sorted([(rev, number.canonical_key())
+                        for number, rev in rands])
+    return (Expr._index, uni_opr, len(rand_keys), tuple(rand_keys))
 
+
+def rands_expr(uni_opr, rands, key=None):
+    '''create the expr of the rands from expr_rands'''
+    expr = Expr(uni_opr)
+    expr.rands = [Rand(number, rev) for number, rev in rands]
+    expr.set_value()
+    expr._key = key
     return expr
 
 
+def expr_create(left, opr, right=None):
+    '''return the expr of left opr right, opr is one of OPERATORS or the
+    name (or a symbol) of an operator in the registry, right is None for
+    a unary operator. return None if the expr can't be created'''
+    if opr not in OPERATORS:
+        numbers = right is None and (left,) or (left, right)
+        return func_create(get_operators([opr])[0], *numbers)
+
+    r = expr_rands(left, opr, right)
+    if r is None:
+        return None
+    return rands_expr(*r)
+
+
 class State(object):
     '''State is a list of numbers created during calculating.
-    Each number can either be a number or an expression
+    Each number can either be a number or an expression.
+    the numbers are a sorted copy, the list of the caller is not changed
     '''
     def __init__(self, numbers):
-        self.numbers = numbers
-        self.numbers.sort()
+        self.numbers = sorted(numbers)
+        self._key = None
+
+    def key(self):
+        if self._key is None:
+            self._key = tuple([n.canonical_key() for n in self.numbers])
+        return self._key
 
     def __repr__(self):
         return '<state: %s>' % repr(self.numbers)
@@ -263,12 +762,7 @@ class State(object):
     def __cmp__(self, other):
         if len(self.numbers) != len(other.numbers):
             return len(self.numbers) - len(other.numbers)
-
-        for i in range(len(self.numbers)):
-            c = cmp(self.numbers[i], other.numbers[i])
-            if c:
-                return c
-        return 0
+        return cmp(self.key(), other.key())
 
     def __lt__(self, other):
         return self.__cmp__(other) < 0
@@ -282,66 +776,631 @@ class State(object):
     def is_computable(self):
         return len(self.numbers) > 1
 
-    def compute(self):
+    def compute(self, stats=None, seen=None, operators=(), bounds=None,
+                target=None):
         '''compute returns a list of child State by picking two 
         numbers from it and calculating to a new number then plus
-        the remaining numbers'''
-        if not self.is_computable():
+        the remaining numbers.
+        the numbers are sorted, so equal numbers are adjacent and only the
+        first of them is picked to avoid the same pairs, and the value of
+        an operation is computed before the Expr is built, to skip the
+        operations giving the same value as a prior one.
+        seen is the set of keys of the states generated before, the new
+        states are added to it, and the states in it are not generated.
+        operators are the extra Operators from the registry, the binary
+        ones are applied to the pairs in both orders, and the unary ones
+        to each number when they change its value.
+        the intermediate numbers out of the bounds (see Bounds) are
+        dropped, and with the target given, the last operation of a state
+        of two numbers only makes the states of the target'''
+        binary = [o for o in operators if o.arity == 2]
+        unary = [o for o in operators if o.arity == 1]
+        if not self.is_computable() and not unary:
             return None
-
-        combs = []
+        # nothing is applied to the last number without operators, so the
+        # other values of it are never answers
+        last = target is not None and len(self.numbers) == 2 and not operators
+        # the bounds are of the intermediate values, not the last number
+        unary_bounds = len(self.numbers) > 1 and bounds or None
+        bounds = len(self.numbers) > 2 and bounds or None
+
+        keys = self.key()
+        child_states = []
+        if seen is None:
+            seen = set()
         count = len(self.numbers)
         for i in range(count - 1):
-            for j in range(i + 1, count):
-                numbers = self.numbers[:]
-                y,x = numbers.pop(j), numbers.pop(i)
-                comb = State([x,y]), State(numbers)
-                if comb not in combs:
-                    combs.append(comb)
+            if i and keys[i] == keys[i - 1]:
+                # the same pairs as numbers[i - 1]
+                if stats is not None:
+                    stats.pairs_skipped += count - i - 1
+                continue
 
-        child_states = []
-        for comb in combs:
-            x,y = comb[0].numbers
-            numbers = comb[1].numbers
-            new_number_values = []
-            for opr in ('+', '-', '*', '/', 'r/'):
-                expr = expr_create(x, opr, y)
-                if (expr is None or expr.value is None or 
-                        expr.value in new_number_values):
+            for j in range(i + 1, count):
+                if j > i + 1 and keys[j] == keys[j - 1]:
+                    if stats is not None:
+                        stats.pairs_skipped += 1
                     continue
 
-                new_number_values.append(expr.value)
-
-                new_numbers = numbers[:]
-                new_numbers.append(expr)
-                new_state = State(new_numbers)
-                if not new_state in child_states:
+                x, y = self.numbers[i], self.numbers[j]
+                numbers = (self.numbers[:i] + self.numbers[i + 1:j] + 
+                            self.numbers[j + 1:])
+                number_keys = keys[:i] + keys[i + 1:j] + keys[j + 1:]
+                new_number_values = []
+                for opr in OPERATORS:
+                    value = opr_value(x.value, opr, y.value)
+                    if value is None or value in new_number_values:
+                        continue
+                    new_number_values.append(value)
+                    if last and value != target:
+                        if stats is not None:
+                            stats.oprs_pruned += 1
+                        continue
+                    if bounds is not None and not bounds.allows(
+                                        value.numerator, value.denominator):
+                        if stats is not None:
+                            stats.oprs_bounded += 1
+                        continue
+
+                    r = expr_rands(x, opr, y)
+                    if r is None:
+                        continue
+
+                    # the key of the new state is known before the Expr
+                    # is built, so states reached before cost nothing
+                    expr_key = rands_key(*r)
+                    new_keys = list(number_keys)
+                    bisect.insort(new_keys, expr_key)
+                    new_keys = tuple(new_keys)
+                    if new_keys in seen:
+                        if stats is not None:
+                            stats.states_dropped += 1
+                        continue
+                    seen.add(new_keys)
+
+                    new_state = State(numbers +
+                                        [rands_expr(r[0], r[1], expr_key)])
+                    new_state._key = new_keys
                     child_states.append(new_state)
 
+                for operator in binary:
+                    for a, b in ((x, y), (y, x)):
+                        n = func_create(operator, a, b)
+                        if n is None or n.value in new_number_values:
+                            continue
+                        new_number_values.append(n.value)
+                        if bounds is not None and not bounds.allows_number(n):
+                            continue
+                        self._add_child(child_states, seen, stats, numbers,
+                                        number_keys, n)
+
+                if stats is not None:
+                    stats.pairs += 1
+                    stats.oprs += len(new_number_values)
+                    stats.oprs_skipped += (len(OPERATORS) +
+                            len(binary) * 2 - len(new_number_values))
+
+        for i in range(unary and count or 0):
+            if i and keys[i] == keys[i - 1]:
+                continue
+            x = self.numbers[i]
+            numbers = self.numbers[:i] + self.numbers[i + 1:]
+            number_keys = keys[:i] + keys[i + 1:]
+            new_number_values = [x.value]
+            for operator in unary:
+                n = func_create(operator, x)
+                if n is None or n.value in new_number_values:
+                    continue
+                new_number_values.append(n.value)
+                if (unary_bounds is not None and
+                        not unary_bounds.allows_number(n)):
+                    continue
+                self._add_child(child_states, seen, stats, numbers,
+                                number_keys, n)
+
+        if stats is not None:
+            stats.states += len(child_states)
         return child_states
 
+    @staticmethod
+    def _add_child(child_states, seen, stats, numbers, number_keys, number):
+        new_keys = list(number_keys)
+        bisect.insort(new_keys, number.canonical_key())
+        new_keys = tuple(new_keys)
+        if new_keys in seen:
+            if stats is not None:
+                stats.states_dropped += 1
+            return
+        seen.add(new_keys)
+
+        new_state = State(numbers + [number])
+        new_state._key = new_keys
+        child_states.append(new_state)
+
+
+class SearchStats(object):
+    '''counters of a search, pass one to solve to collect them'''
+    def __init__(self):
+        # the pairs of numbers picked, and skipped as the same pairs
+        self.pairs = 0
+        self.pairs_skipped = 0
+        # the operations computed to new values, and skipped as giving
+        # the same values or no values
+        self.oprs = 0
+        self.oprs_skipped = 0
+        # the states (with the Expr) generated, and dropped before the Expr
+        # is built as reached before
+        self.states = 0
+        self.states_dropped = 0
+        # the values computed but not made into states, as the last
+        # operation not giving the target, or out of the bounds
+        self.oprs_pruned = 0
+        self.oprs_bounded = 0
 
-def solve(integers, target=24):
-    '''return a list of Expr that compute to the target'''
+    def __repr__(self):
+        return '<stats: %s>' % ', '.join(['%s=%d' % (k, getattr(self, k))
+            for k in ('pairs', 'pairs_skipped', 'oprs', 'oprs_skipped',
+                        'states', 'states_dropped', 'oprs_pruned',
+                        'oprs_bounded')])
+
+
+class Bounds(object):
+    '''the bounds of the absolute numerators and the denominators of the
+    intermediate values, None for no bound.
+    the searches drop the values out of the bounds, which keeps the
+    arithmetic in small ints for the hands of large integers or targets,
+    but an answer is missed if all the ways to compute it go through such
+    values, like (13 × 13 × 13 - 1) ÷ 61 = 36 with numerator=1000'''
+    def __init__(self, numerator=None, denominator=None):
+        self.numerator = numerator
+        self.denominator = denominator
 
-    init_state = State([Number(i) for i in integers])
+    def __repr__(self):
+        return '<bounds: %s/%s>' % (self.numerator, self.denominator)
+
+    def allows(self, numerator, denominator=1):
+        return ((self.numerator is None or abs(numerator) <= self.numerator)
+                and (self.denominator is None or
+                        denominator <= self.denominator))
+
+    def allows_number(self, number):
+        value = Fraction(number.value)
+        return self.allows(value.numerator, value.denominator)
+
+
+class CancelToken(object):
+    '''a token to cancel a running solve from another thread'''
+    def __init__(self):
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+def stop_checker(timeout=None, cancel=None):
+    '''return a function which tells if a search should stop, either the
+    timeout (in seconds) expires or the cancel token is cancelled'''
+    deadline = timeout is not None and time.time() + timeout or None
+
+    def stopped():
+        return ((cancel is not None and cancel.cancelled) or
+                (deadline is not None and time.time() >= deadline))
+    return stopped
+
+
+class Solutions(list):
+    '''the list of Expr returned by solve, truncated is True if the search
+    was stopped before finished and the list may be incomplete'''
+    truncated = False
+
+
+ENGINE_SEARCH = 'search'
+ENGINE_MITM = 'mitm'
+
+
+def solve(integers, target=24, timeout=None, cancel=None, found=None,
+            stats=None, engine=ENGINE_SEARCH, limit=None, operators=None,
+            bounds=None):
+    '''return a list of Expr that compute to the target.
+    the states are searched depth first so the answers are found along the
+    way, found is called with each answer once it's found. if the timeout
+    expires or the cancel token is cancelled, the answers found so far are
+    returned with the truncated flag set, so are the answers if there are
+    more than limit. the counters of the search are added to stats if it's
+    a SearchStats.
+    with engine=ENGINE_MITM, the hand is solved by SubsetSolver instead,
+    which is much faster for large hands but finds only some of the
+    answers (at least one if the hand is solvable).
+    operators are the names of the operators in the registry to use besides
+    + - * /, like ('^', '!', 'sqrt', '|'), only by the search engine.
+    bounds is a Bounds of the intermediate values, the answers through the
+    values out of it are missed'''
+    stopped = stop_checker(timeout, cancel)
+    operators = get_operators(operators)
+    if operators and engine != ENGINE_SEARCH:
+        raise ValueError('Only the search engine takes extra operators')
+
+    if engine == ENGINE_MITM:
+        return SubsetSolver(bounds).solve(integers, target, stopped, found,
+                                            limit)
+    elif engine != ENGINE_SEARCH:
+        raise ValueError('Invalid engine: %s' % engine)
+
+    exprs = Solutions()
+    expr_keys = set()
 
-    cur_states = [init_state]
-    while cur_states[0].is_computable():
-        child_states = []
-        for state in cur_states:
-            child_states.extend(state.compute())
-        cur_states = child_states
+    init_state = State([Number(i) for i in integers])
+    stack = [init_state]
+    # the keys include the number of numbers, so it's safe to share
+    # one set for the states of all levels
+    state_keys = set()
+    while stack:
+        if stopped():
+            exprs.truncated = True
+            break
+
+        state = stack.pop()
+        if len(state.numbers) == 1:
+            expr = state.numbers[0]
+            if expr.value == target and expr.canonical_key() not in expr_keys:
+                expr_keys.add(expr.canonical_key())
+                exprs.append(expr)
+                if found is not None:
+                    found(expr)
+                if limit is not None and len(exprs) >= limit:
+                    exprs.truncated = bool(stack)
+                    break
+            if not operators:
+                continue
 
-    exprs = []
-    for state in cur_states:
-        expr = state.numbers[0]
-        if expr.value == target and expr not in exprs:
-            exprs.append(expr)
+        # the same state reached from different parents is generated once
+        child_states = state.compute(stats, state_keys, operators, bounds,
+                                        target)
+        if not child_states:
+            continue
+        child_states.reverse()
+        stack.extend(child_states)
 
     return exprs
 
 
+# the typecode of the packed values, 'q' (64 bits) is missing before
+# Python 3.3, where 'l' is the widest
+try:
+    array('q')
+    VALUE_TYPECODE = 'q'
+except ValueError:
+    VALUE_TYPECODE = 'l'
+
+if hasattr(array, 'frombytes'):
+    def _array_bytes(a):
+        return a.tobytes()
+
+    def _array_extend(a, b):
+        a.frombytes(b)
+else:
+    def _array_bytes(a):
+        return a.tostring()
+
+    def _array_extend(a, b):
+        a.fromstring(b)
+
+
+def pack_values(values):
+    '''pack a list of non-negative rationals, each a (numerator,
+    denominator) pair, into a bytes key of their sorted numerators and
+    denominators. values beyond the array items (64 bits, or a C long
+    before Python 3.3) are kept as a tuple key'''
+    values = sorted(values)
+    flat = [x for value in values for x in value]
+    try:
+        return _array_bytes(array(VALUE_TYPECODE, flat))
+    except OverflowError:
+        return tuple(flat)
+
+
+def unpack_values(packed):
+    '''return the list of (numerator, denominator) of a packed key'''
+    if isinstance(packed, tuple):
+        flat = packed
+    else:
+        flat = array(VALUE_TYPECODE)
+        _array_extend(flat, packed)
+    return [(flat[i], flat[i + 1]) for i in range(0, len(flat), 2)]
+
+
+def combine_oprs(a, b):
+    '''return the list of (operator, value) computed from rationals a and
+    b, the same operators as State.compute: +, the non-negative -, *, /
+    and r/, the values are in lowest terms'''
+    an, ad = a
+    bn, bd = b
+    results = [('+', an * bd + bn * ad, ad * bd),
+                ('-', abs(an * bd - bn * ad), ad * bd),
+                ('*', an * bn, ad * bd)]
+    if bn:
+        results.append(('/', an * bd, ad * bn))
+    if an:
+        results.append(('r/', bn * ad, bd * an))
+
+    oprs = []
+    for opr, n, d in results:
+        g = gcd(n, d)
+        oprs.append((opr, (n // g, d // g)))
+    return oprs
+
+
+def combine_values(a, b):
+    '''return the set of values computed from rationals a and b'''
+    return set([value for opr, value in combine_oprs(a, b)])
+
+
+def packed_levels(integers, stopped=None):
+    '''the value-only search of solve, yields the frontier of each level as
+    a set of packed states (see pack_values), the last one is the set of
+    values computed with all of the integers. the levels end early if
+    stopped (see stop_checker) returns True'''
+    frontier = set([pack_values([(i, 1) for i in integers])])
+    yield frontier
+
+    for level in range(len(integers) - 1):
+        next_frontier = set()
+        for packed in frontier:
+            if stopped is not None and stopped():
+                return
+
+            values = unpack_values(packed)
+            pairs = set()
+            for i in range(len(values) - 1):
+                for j in range(i + 1, len(values)):
+                    if (values[i], values[j]) in pairs:
+                        continue
+                    pairs.add((values[i], values[j]))
+
+                    rest = values[:i] + values[i + 1:j] + values[j + 1:]
+                    for value in combine_values(values[i], values[j]):
+                        next_frontier.add(pack_values(rest + [value]))
+        frontier = next_frontier
+        yield frontier
+
+
+class Values(set):
+    '''the set of values returned by reachable, truncated is True if the
+    search was stopped before finished, and the set is empty'''
+    truncated = False
+
+
+def reachable(integers, timeout=None, cancel=None):
+    '''return the set of values can be computed with all of the integers'''
+    values = Values()
+    levels = 0
+    for frontier in packed_levels(integers, stop_checker(timeout, cancel)):
+        levels += 1
+
+    if levels < len(integers):
+        values.truncated = True
+        return values
+
+    for packed in frontier:
+        n, d = unpack_values(packed)[0]
+        values.add(d == 1 and n or Fraction(n, d))
+    return values
+
+
+def solvable(integers, target=24, timeout=None, cancel=None):
+    '''check if the integers can compute to the target, without building
+    any Expr. return None if the search was stopped before finished'''
+    values = reachable(integers, timeout, cancel)
+    if values.truncated:
+        return None
+    return target in values
+
+
+class Stopped(Exception):
+    '''raised inside SubsetSolver when the search should stop'''
+
+
+def split_multiset(key):
+    '''yield each split of a multiset (a sorted tuple) into two non-empty
+    sorted tuples (a, b), only once for (a, b) and (b, a)'''
+    distinct = sorted(set(key))
+    counts = [key.count(i) for i in distinct]
+    for taken in itertools.product(*[range(c + 1) for c in counts]):
+        a, b = [], []
+        for i, t, c in zip(distinct, taken, counts):
+            a.extend([i] * t)
+            b.extend([i] * (c - t))
+        a, b = tuple(a), tuple(b)
+        if a and b and a <= b:
+            yield a, b
+
+
+class SubsetSolver(object):
+    '''a meet-in-the-middle solver.
+    the values (in lowest terms, as (numerator, denominator)) computed
+    with each sub-multiset of a hand are kept, each with a witness to
+    rebuild an Expr of it. a hand is solved by splitting it into two parts
+    in every way, and looking up the values of one part which compute the
+    target with a value of the other part, the values of the whole hand
+    are never computed. the values are kept across hands, so the hands
+    sharing sub-multisets are solved faster with the same solver.
+    the values out of the bounds (a Bounds) are not kept'''
+    def __init__(self, bounds=None):
+        self.bounds = bounds
+        # sorted tuple of integers -> {value: witness}, a witness is
+        # (opr, a, value of a, b, value of b) or None for an integer
+        self.values = {}
+        # the number of multisets whose values were computed
+        self.computed = 0
+
+    def subset_values(self, key, stopped=None):
+        '''return the values of a multiset given as a sorted tuple'''
+        values = self.values.get(key)
+        if values is not None:
+            return values
+
+        if stopped is not None and stopped():
+            raise Stopped()
+
+        if len(key) == 1:
+            values = {(key[0], 1): None}
+        else:
+            values = {}
+            bounds = self.bounds
+            for a, b in split_multiset(key):
+                if stopped is not None and stopped():
+                    raise Stopped()
+                values_b = self.subset_values(b, stopped)
+                for value_a in self.subset_values(a, stopped):
+                    for value_b in values_b:
+                        for opr, value in combine_oprs(value_a, value_b):
+                            if (bounds is not None and
+                                    not bounds.allows(*value)):
+                                continue
+                            if value not in values:
+                                values[value] = (opr, a, value_a, b, value_b)
+        self.values[key] = values
+        self.computed += 1
+        return values
+
+    def build(self, key, value):
+        '''return the Expr of a value of a multiset'''
+        witness = self.values[key][value]
+        if witness is None:
+            return Number(key[0])
+        opr, a, value_a, b, value_b = witness
+        return expr_create(self.build(a, value_a), opr, self.build(b, value_b))
+
+    @staticmethod
+    def matches(value, target):
+        '''yield (opr, other) for each other value that computes the target
+        as expr_create(value, opr, other)'''
+        (n, d), (tn, td) = value, target
+        candidates = [('+', tn * d - n * td, td * d),
+                        ('-', n * td - tn * d, td * d),
+                        ('-', n * td + tn * d, td * d)]
+        if n and tn:
+            candidates.append(('*', tn * d, td * n))
+            candidates.append(('/', n * td, d * tn))
+            candidates.append(('r/', tn * n, td * d))
+        elif not tn:
+            # x * 0 = 0
+            candidates.append(('*', 0, 1))
+        for opr, n, d in candidates:
+            if n >= 0:
+                g = gcd(n, d)
+                yield opr, (n // g, d // g)
+
+    def solve(self, integers, target=24, stopped=None, found=None,
+                limit=None):
+        '''return the Solutions of a hand, see calc.solve'''
+        exprs = Solutions()
+        expr_keys = set()
+
+        key = tuple(sorted(integers))
+        target = Fraction(target)
+        target = (target.numerator, target.denominator)
+        if target[0] < 0:
+            return exprs
+
+        try:
+            if len(key) == 1:
+                if (key[0], 1) == target:
+                    exprs.append(Number(key[0]))
+                return exprs
+
+            # the balanced splits first, their parts have much less values
+            splits = sorted(split_multiset(key), key=lambda split:
+                                abs(len(split[1]) - len(split[0])))
+            for a, b in splits:
+                values_a = self.subset_values(a, stopped)
+                values_b = self.subset_values(b, stopped)
+                if len(values_a) > len(values_b):
+                    a, values_a, b, values_b = b, values_b, a, values_a
+
+                for value_a in values_a:
+                    matches = list(self.matches(value_a, target))
+                    if value_a[0] == 0 and target[0] == 0:
+                        # 0 * x = 0, any value of b
+                        matches.append(('*', next(iter(values_b))))
+                    for opr, value_b in matches:
+                        if value_b not in values_b:
+                            continue
+
+                        expr = expr_create(self.build(a, value_a), opr,
+                                            self.build(b, value_b))
+                        if (expr is None or expr.value != Fraction(*target)
+                                or expr.canonical_key() in expr_keys):
+                            continue
+
+                        expr_keys.add(expr.canonical_key())
+                        exprs.append(expr)
+                        if found is not None:
+                            found(expr)
+                        if limit is not None and len(exprs) >= limit:
+                            exprs.truncated = True
+                            return exprs
+
+                if stopped is not None and stopped():
+                    raise Stopped()
+
+        except Stopped:
+            exprs.truncated = True
+        return exprs
+
+
+def is_submultiset(a, b):
+    '''check if the sorted tuple a is a sub-multiset of the sorted tuple b'''
+    i = 0
+    for x in a:
+        while i < len(b) and b[i] < x:
+            i += 1
+        if i == len(b) or b[i] != x:
+            return False
+        i += 1
+    return True
+
+
+class SolveSession(object):
+    '''a hand which changes by one integer at a time, solved by a
+    SubsetSolver of its own (self.solver). the values of the sub-multisets
+    of the hand are kept, so after an integer is replaced, added or
+    removed, only the sub-multisets with the new integer are computed. the
+    values of the sub-multisets no longer in the hand are dropped, so the
+    memory is bounded by the hand'''
+    def __init__(self, integers=(), bounds=None):
+        self.solver = SubsetSolver(bounds)
+        self.integers = sorted(integers)
+
+    def replace(self, old, new):
+        integers = self.integers[:]
+        integers.remove(old)
+        integers.append(new)
+        self._update(integers)
+
+    def add(self, integer):
+        self._update(self.integers + [integer])
+
+    def remove(self, integer):
+        integers = self.integers[:]
+        integers.remove(integer)
+        self._update(integers)
+
+    def _update(self, integers):
+        self.integers = sorted(integers)
+        hand = tuple(self.integers)
+        values = self.solver.values
+        for key in list(values):
+            if not is_submultiset(key, hand):
+                del values[key]
+
+    def solve(self, target=24, timeout=None, cancel=None, found=None,
+                limit=None):
+        '''return the Solutions of the current hand, see calc.solve'''
+        return self.solver.solve(self.integers, target,
+                        stop_checker(timeout, cancel), found, limit)
+
+
 class TokenReader(object):
     def __init__(self, solution):
         self.solution = solution
@@ -355,7 +1414,6 @@ class TokenReader(object):
         if self.cache:
             return self.cache.pop()
 
-        chars = ('(', ')', '+', '-', '*', '/')
         token = ''
         digit = False
         i, s = self.cursor, self.solution
@@ -369,16 +1427,31 @@ class TokenReader(object):
                 if not digit:
                     digit = True
                 token += s[i]
-    
-            elif s[i] in chars:
-                if digit:
-                    self.cursor = i
-                    return token
-                else:
-                    self.cursor = i + 1
-                    return s[i]
-    
+
+            elif digit:
+                # a number ends before any other character
+                self.cursor = i
+                return token
+
+            elif s[i].isalpha():
+                # the ascii name of an operator, like sqrt
+                j = i
+                while j < len(s) and s[j].isalpha():
+                    j += 1
+                if symbol_operator(s[i:j]) is None:
+                    raise ValueError('Invalid token: %s' % s[i:j])
+                self.cursor = j
+                return s[i:j]
+
+            elif s[i] in PARSE_CHARS:
+                self.cursor = i + 1
+                return s[i]
+
             else:
+                for symbol in _operator_symbols:
+                    if s.startswith(symbol, i):
+                        self.cursor = i + len(symbol)
+                        return symbol
                 raise ValueError('Invalid character: %s' % s[i])
     
             i += 1
@@ -393,6 +1466,66 @@ class TokenReader(object):
         return s
 
 
+def token_operator(token, fixity):
+    '''return the Operator of the registry the token is, or None'''
+    if isinstance(token, BaseNumber):
+        return None
+    operator = symbol_operator(token)
+    if operator is not None and operator.fixity == fixity:
+        return operator
+    return None
+
+
+def read_unary(tr, token):
+    '''read an operand with the prefix and postfix operators of the
+    registry, like √9 and 3!'''
+    operator = token_operator(token, FIXITY_PREFIX)
+    if operator is not None:
+        token = tr.read()
+        if isinstance(token, BaseNumber) or token != '(':
+            # the postfix operators apply to the operand, √9! is √(9!)
+            n = read_unary(tr, token)
+            return FuncExpr(operator, (n,), func_value(operator, (n,)))
+        # a parenthesized operand is read like the argument of a function
+        # call, so the postfix operators apply after, sqrt(4)! is (sqrt 4)!
+        n = read_expr(tr, exit_at_right_p=True)
+        n = FuncExpr(operator, (n,), func_value(operator, (n,)))
+    elif isinstance(token, BaseNumber):
+        n = token
+    elif token == '(':
+        n = read_expr(tr, exit_at_right_p=True)
+    elif token.isdigit():
+        n = Number(int(token))
+    else:
+        raise ValueError('Invalid token <%s>: %s' % (token, tr.unparsed()))
+
+    while True:
+        token = tr.read()
+        operator = token_operator(token, FIXITY_POSTFIX)
+        if operator is None:
+            tr.push(token)
+            return n
+        n = FuncExpr(operator, (n,), func_value(operator, (n,)))
+
+
+def read_operand(tr, token):
+    '''read an operand with the infix operators of the registry, like
+    2^3 and 1|2, which take precedence over + - * /'''
+    n = read_unary(tr, token)
+    while True:
+        token = tr.read()
+        operator = token_operator(token, FIXITY_INFIX)
+        if operator is None:
+            tr.push(token)
+            return n
+
+        if operator.right_assoc:
+            right = read_operand(tr, tr.read())
+        else:
+            right = read_unary(tr, tr.read())
+        n = FuncExpr(operator, (n, right), func_value(operator, (n, right)))
+
+
 def read_expr(tr, exit_at_right_p=False, exit_at_one_expr=False):
     '''a simple arithmatic expression parser. 
     during parsing, the parser can be in one of the following states:
@@ -408,7 +1541,8 @@ def read_expr(tr, exit_at_right_p=False, exit_at_one_expr=False):
     while True:
         token = tr.read()
 
-        if isinstance(token, BaseNumber) or token == '(' or token.isdigit():
+        if (isinstance(token, BaseNumber) or token == '(' or
+                token.isdigit() or token_operator(token, FIXITY_PREFIX)):
             # read an operand
             if mode != 'n':
                 raise ValueError('Invalid token <%s>: %s' % 
@@ -416,10 +1550,8 @@ def read_expr(tr, exit_at_right_p=False, exit_at_one_expr=False):
 
             if isinstance(token, BaseNumber):
                 n = token
-            elif token == '(':
-                n = read_expr(tr, exit_at_right_p=True)
             else:
-                n = Number(int(token))
+                n = read_operand(tr, token)
 
             if not left:
                 left = n
@@ -482,6 +1614,10 @@ def read_expr(tr, exit_at_right_p=False, exit_at_one_expr=False):
             if exit_at_right_p and expr and mode == 'x':
                 return expr
 
+            if exit_at_right_p and not expr and mode == 'o':
+                # a parenthesized operand
+                return left
+
             raise ValueError('Invalid token (%s): %s' % 
                             (token, tr.unparsed()))
 
@@ -490,6 +1626,11 @@ def read_expr(tr, exit_at_right_p=False, exit_at_one_expr=False):
             if mode == 'x' and not exit_at_right_p:
                 return expr
 
+            elif (mode == 'o' and not exit_at_right_p and
+                    isinstance(left, FuncExpr)):
+                # an operator of the registry alone, like 4!
+                return left
+
             elif mode == 'x':
                 missed = ')'
 
@@ -503,6 +1644,10 @@ def read_expr(tr, exit_at_right_p=False, exit_at_one_expr=False):
 
 
 def parse(solution):
+    if not isinstance(solution, type(u'')):
+        solution = solution.decode('utf-8')
+    # accept the math operators used by Expr.__str__
+    solution = solution.replace(u'×', u'*').replace(u'÷', u'/')
     return read_expr(TokenReader(solution))
 
 
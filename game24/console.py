@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+'''the interactive console of the game, it is only imported by the
+24gameconsole script under interactive mode.
+the console is an adapter of engine.GameSession on the terminal, it
+reads the lines of input by readline'''
+
+from __future__ import absolute_import, print_function, division
+
+import sys
+import readline
+
+try:
+    import builtins
+    raw_input = getattr(builtins, 'input')
+except ImportError:
+    pass
+
+from .engine import GameSession, INPUT_EOF
+
+
+class GameConsole(object):
+    def __init__(self, target=24, count=4, face2ten=False, showcard=False,
+                    timeout=None, store=None, player=None, seed=None):
+        self.session = GameSession(target, count, face2ten, showcard,
+                                    timeout, store, player, seed=seed)
+
+    @staticmethod
+    def raw_input_ex(prompt='', default=''):
+        '''enhance raw_input to support default input and also flat EOF'''
+        try:
+            readline.set_startup_hook(lambda: readline.insert_text(default))
+            try:
+                return raw_input(prompt)
+            finally:
+                readline.set_startup_hook()
+
+        except EOFError:
+            return INPUT_EOF
+
+    def input_loop(self):
+        '''feed the session with the lines of input until it's closed'''
+        session = self.session
+        output = session.start()
+        while not session.closed:
+            sys.stdout.write(output)
+            output = session.feed(self.raw_input_ex(session.prompt))
+            while session.pending is not None:
+                session.pending.result()
+                output += session.resume()
+        sys.stdout.write(output)
+
+    def main(self):
+        '''the main entry of the game console'''
+        try:
+            self.input_loop()
+        finally:
+            self.session.close()
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+'''the deck of a game, dealt from a pre-shuffled array.
+
+a Deck shuffles its cards once per set with a random.Random of its own,
+then each hand is a slice at the cursor, so a draw costs O(1) per card
+and the deals of a seed are the same on every run (and not touched by
+the other users of the module random). deals yields the integer deals of
+a seed for the simulations and benchmarks:
+    for integers in itertools.islice(deals(seed=24), 1000000):
+        ...'''
+
+from __future__ import absolute_import, print_function, division
+
+import random
+import sys
+
+try:
+    import builtins
+    unichr = getattr(builtins, 'chr')
+except ImportError:
+    pass
+
+
+CARD_SPADES = 0x1f0a1
+CARD_HEARTS = 0x1f0b1
+CARD_DIAMONDS = 0x1f0c1
+CARD_CLUBS = 0x1f0d1
+
+
+class Card(object):
+    '''card is uniquely identified by the unicode code point value (self.code)
+    self.integer is the integer value the card represents'''
+    def __init__(self, code, integer):
+        self.code = code
+        self.integer = integer
+
+    def __str__(self):
+        if sys.version < '3':
+            return unichr(self.code).encode('utf-8')
+        else:
+            return unichr(self.code)
+
+    def __unicode__(self):
+        return unichr(self.code)
+
+    def __repr__(self):
+        return repr(self.__unicode__())
+
+
+# face2ten -> the tuple of the 52 cards, the cards never change so the
+# decks of all the games share them
+_CARDS = {}
+
+
+def deck_cards(face2ten=False):
+    '''return the 52 cards of a deck, J Q K are 10 if face2ten'''
+    cards = _CARDS.get(face2ten)
+    if cards is not None:
+        return cards
+
+    cards = []
+    for i in range(13):
+        integer = i + 1
+        if face2ten and i in (10, 11, 12):
+            integer = 10
+
+        for j in (CARD_SPADES, CARD_HEARTS, CARD_DIAMONDS, CARD_CLUBS):
+            code = j + i
+            if i in (11, 12):
+                # the card of C is not considered
+                code += 1
+            cards.append(Card(code, integer))
+    cards = _CARDS[face2ten] = tuple(cards)
+    return cards
+
+
+def deck_integers(face2ten=False):
+    '''return the integers of the 52 cards of a deck'''
+    return [card.integer for card in deck_cards(face2ten)]
+
+
+class Deck(object):
+    '''the cards (any objects) dealt from an array shuffled by a
+    random.Random seeded with seed, None to seed from the system'''
+    def __init__(self, cards, seed=None):
+        self.cards = list(cards)
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.cursor = 0
+        self.shuffle()
+
+    def __len__(self):
+        '''the number of cards not dealt'''
+        return len(self.cards) - self.cursor
+
+    def shuffle(self):
+        '''put all the cards back and shuffle them'''
+        self.random.shuffle(self.cards)
+        self.cursor = 0
+
+    def draw(self, count):
+        '''return a list of count cards, or None if less are left'''
+        cursor = self.cursor
+        if len(self.cards) - cursor < count:
+            return None
+        self.cursor = cursor + count
+        return self.cards[cursor:cursor + count]
+
+    def remaining(self):
+        return self.cards[self.cursor:]
+
+
+def deals(seed=None, count=4, face2ten=False):
+    '''yield the tuples of count integers dealt from a deck seeded with
+    seed forever, the deck is shuffled again once less than count cards
+    are left, like the sets of a game'''
+    integers = deck_integers(face2ten)
+    shuffle = random.Random(seed).shuffle
+    while True:
+        shuffle(integers)
+        # the tuples of count integers in a row, the rest are left
+        for hand in zip(*[iter(integers)] * count):
+            yield hand
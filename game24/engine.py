@@ -0,0 +1,407 @@
+# -*- coding: utf-8 -*-
+'''the game engine, a state machine of the menus and the plays of a
+player, free of any I/O.
+
+an adapter (the console, or the server for many players) writes the
+output of the engine, and feeds it the lines of input, each ends with the
+prompt to show:
+    session = GameSession()
+    output = session.start()
+    while not session.closed:
+        write(output + session.prompt)
+        output = session.feed(read_line())
+        while session.pending is not None:
+            wait(session.pending)
+            output += session.resume()
+
+the engine never blocks on solving. the hands are solved in background
+(by the executor if it's given), and a hand checked by the player is
+solved by the executor, in which case the engine sets pending to the
+future of the solve and waits for resume to be called once it's done'''
+
+from __future__ import absolute_import, print_function, division
+
+from . import calc, game
+
+
+MSG_MENU_MAIN = '''1. Play (p)
+2. Check answer (c)
+3. Quit (q)
+4. Leaderboard (l)'''
+
+MSG_MENU_PLAY = '''1. Definitely no solutions (n)
+2. Give me a hint (h)
+3. I gave up, show me the answer (s)
+4. Back to the main menu (b)
+5. Quit the game (q)'''
+
+MSG_MENU_SET_END = '''1. One more set (n)
+2. Back to the main menu (b)
+3. Quit the game (q)'''
+
+MSG_MENU_PLAY_RIGHT = '''1. Try other solutions (t)
+2. Next hand (n)
+3. Show me the answers (s)
+4. Quit the game (q)'''
+
+MSG_SELECT = 'Your choice: '
+MSG_INVALID_INPUT = 'Invalid input!'
+MSG_INVALID_INTEGER = 'Invalid integer: %s'
+MSG_INVALID_OPERATOR = 'Invalid operator: %s'
+
+MSG_PLAY_NEW_SET = 'Set %d'
+MSG_PLAY_NEW_HAND = 'Hand %d: %s'
+MSG_PLAY_INPUT_EXPR = 'Input your solution or one of the above choices: '
+MSG_PLAY_RIGHT = 'Good Job!'
+MSG_PLAY_FIND_BUG = '''Great Job!
+You not only solved the problem, but also found a bug!
+Please report to me with the cards and your solution if you don't mind.'''
+MSG_PLAY_WRONG = "Sorry! It's not correct!"
+MSG_PLAY_ALL_CARDS = 'Please use each card of the hand exactly once'
+MSG_PLAY_NO_ANSWER = 'Seems no solutions'
+MSG_PLAY_SEARCHING = 'Still searching the answers, please try later'
+MSG_PLAY_TRUNCATED = 'Search stopped at the time limit, answers may be missed'
+MSG_PLAY_NO_CARDS = 'Set end, your result'
+
+MSG_INPUT_NUMBERS = 'Please input %d integers: '
+
+MSG_NO_STATS = 'No statistics, start the game with --stats FILE'
+MSG_LEADERBOARD = '%-16s %6s %6s %6s %8s'
+
+INPUT_EOF = '\x00'
+
+# the seconds to search the answers of the checked integers if the session
+# has no timeout, the checked integers are solved in the foreground
+CHECK_TIMEOUT = 10.0
+
+STATE_MAIN = 'main'
+STATE_CHECK = 'check'
+STATE_PLAY = 'play'
+STATE_PLAY_RIGHT = 'play_right'
+STATE_SET_END = 'set_end'
+STATE_CLOSED = 'closed'
+
+
+def str_title(title, dechar='', delen=50):
+    return '%s\n%s\n%s\n' % (dechar * delen, title, dechar * delen)
+
+
+class GameSession(game.Game):
+    '''the game of a player, driven by the lines of input'''
+    def __init__(self, target=24, count=4, face2ten=False, showcard=False,
+                    timeout=None, store=None, player=None, executor=None,
+                    seed=None):
+        # hands are solved in background, so a large count doesn't block
+        super(GameSession, self).__init__(target, count, face2ten, timeout,
+                                    background=True, store=store,
+                                    player=player, executor=executor,
+                                    seed=seed)
+        self.showcard = showcard
+
+        self.state = STATE_MAIN
+        self.prompt = MSG_SELECT
+        # the future of a solve the engine is waiting for
+        self.pending = None
+        self._resume = None
+        self._out = []
+
+    @property
+    def closed(self):
+        return self.state == STATE_CLOSED
+
+    def _print(self, s=''):
+        self._out.append('%s\n' % s)
+
+    def _title(self, title, dechar=''):
+        self._out.append(str_title(title, dechar))
+
+    def _flush(self):
+        out = ''.join(self._out)
+        self._out = []
+        return out
+
+    def _menu(self, state, menu, prompt=MSG_SELECT):
+        self.state = state
+        self.prompt = prompt
+        self._title(menu, dechar='-')
+
+    def _close(self):
+        self.state = STATE_CLOSED
+        self.prompt = ''
+        self.end_hand()
+
+    def start(self):
+        '''return the output of the main menu'''
+        self._menu(STATE_MAIN, MSG_MENU_MAIN)
+        return self._flush()
+
+    def feed(self, line):
+        '''handle a line of input (INPUT_EOF at the end of input), return
+        the output'''
+        r = line.strip()
+        getattr(self, '_on_' + self.state)(r)
+        return self._flush()
+
+    def resume(self):
+        '''handle the result of the pending future, return the output'''
+        future, self.pending = self.pending, None
+        self._resume(future.result())
+        return self._flush()
+
+    def _submit(self, callback, func, *args):
+        '''call func in the executor and callback with the result, or
+        right away without an executor'''
+        if self.executor is None:
+            callback(func(*args))
+        else:
+            self.pending = self.executor.submit(func, *args)
+            self._resume = callback
+
+    def _on_main(self, r):
+        r = r.lower()
+        if not (r in '1p2c3q4l' or r == INPUT_EOF):
+            self._print(MSG_INVALID_INPUT)
+            return
+
+        self._print()
+        if r in '1p':
+            self._new_hand()
+
+        elif r in '2c':
+            self.state = STATE_CHECK
+            self.prompt = MSG_INPUT_NUMBERS % self.count
+
+        elif r in ('3q' + INPUT_EOF):
+            self._close()
+
+        elif r in '4l':
+            if self.store is None:
+                self._title(MSG_NO_STATS)
+                self._menu(STATE_MAIN, MSG_MENU_MAIN)
+            else:
+                # the query waits for the store to write the queued hands
+                self._submit(self._leaderboard, self.store.leaderboard)
+
+    def _on_check(self, r):
+        '''show answers for user provided integers'''
+        if r == INPUT_EOF:
+            self._close()
+            return
+
+        try:
+            integers = [int(s) for s in r.split()]
+        except ValueError:
+            integers = None
+        if not integers or len(integers) != self.count:
+            self._print(MSG_INVALID_INPUT)
+            return
+
+        timeout = self.timeout
+        if timeout is None:
+            timeout = CHECK_TIMEOUT
+        self._submit(self._checked, calc.solve, integers, self.target,
+                        timeout)
+
+    def _checked(self, answers):
+        if answers:
+            s = '\n'.join([str(expr) for expr in answers])
+        else:
+            s = MSG_PLAY_NO_ANSWER
+        if answers.truncated:
+            s = '%s\n%s' % (s, MSG_PLAY_TRUNCATED)
+        self._title(s)
+        self._menu(STATE_MAIN, MSG_MENU_MAIN)
+
+    @staticmethod
+    def str_answer(hand):
+        if hand.answers:
+            s = hand.str_answer()
+        else:
+            s = MSG_PLAY_NO_ANSWER
+        if hand.truncated():
+            s = '%s\n%s' % (s, MSG_PLAY_TRUNCATED)
+        return s
+
+    def _leaderboard(self, rows):
+        lines = [MSG_LEADERBOARD % ('Player', 'Hands', 'Solved', 'Hinted',
+                                                                'Time')]
+        for player, hands, solved, hinted, seconds in rows:
+            lines.append(MSG_LEADERBOARD % (player, hands, solved, hinted,
+                            seconds is not None and '%.1fs' % seconds or '-'))
+        self._title('\n'.join(lines))
+        self._menu(STATE_MAIN, MSG_MENU_MAIN)
+
+    def _result(self):
+        solved = 0
+        failed = 0
+        hinted = 0
+        for hand in self.hands:
+            if hand.result == game.HAND_RESULT_SOLVED:
+                solved += 1
+            elif hand.result == game.HAND_RESULT_HINTED:
+                hinted += 1
+            elif hand.result == game.HAND_RESULT_FAILED:
+                failed += 1
+        self._print()
+        self._print('Total %d hands solved' % solved)
+        self._print('Total %d hands solved with hint' % hinted)
+        self._print('Total %d hands failed to solve' % failed)
+        self._print()
+
+    def _back_to_main(self):
+        self.end_hand()
+        self._menu(STATE_MAIN, MSG_MENU_MAIN)
+
+    def _new_hand(self):
+        if not self.hands:
+            self._title(MSG_PLAY_NEW_SET % self.seti, dechar='*')
+
+        hand = self.new_hand()
+        if not hand:
+            # no enough cards for a new hand
+            self._title(MSG_PLAY_NO_CARDS, dechar='*')
+            self._result()
+            self._menu(STATE_SET_END, MSG_MENU_SET_END)
+            return
+
+        self._print()
+        if self.showcard:
+            sc = hand.str_cards()
+        else:
+            sc = ' '.join([str(i) for i in hand.integers])
+        self._title(MSG_PLAY_NEW_HAND % (len(self.hands), sc), dechar='+')
+        self._print()
+        self._menu(STATE_PLAY, MSG_MENU_PLAY, MSG_PLAY_INPUT_EXPR)
+
+    def _on_set_end(self, r):
+        r = r.lower()
+        if not (r in '1n2b3q' or r == INPUT_EOF):
+            self._print(MSG_INVALID_INPUT)
+            return
+
+        self._print()
+        if r in '1n':
+            # renew the set
+            self.reset()
+            self._new_hand()
+
+        elif r in ('2b' + INPUT_EOF):
+            self._back_to_main()
+
+        elif r in '3q':
+            self._close()
+
+    def _on_play(self, r):
+        hand = self.hands[-1]
+        if r.lower() in '1n2h3s4b5q' or r == INPUT_EOF:
+            self._print()
+            self._play_choice(hand, r.lower())
+            return
+
+        try:
+            expr = calc.parse(r)
+        except ValueError as e:
+            self._print(str(e))
+            return
+
+        # the hands are solved with + - * / only
+        names = calc.func_operators(expr)
+        if names:
+            self._print(MSG_INVALID_OPERATOR % ', '.join(sorted(names)))
+            return
+
+        integers = expr.get_integers()
+        for i in integers:
+            if i not in hand.integers:
+                self._print(MSG_INVALID_INTEGER % i)
+                return
+
+        if sorted(integers) != sorted(hand.integers):
+            self._title(MSG_PLAY_ALL_CARDS)
+            self._menu(STATE_PLAY, MSG_MENU_PLAY, MSG_PLAY_INPUT_EXPR)
+            return
+
+        if expr.value != self.target:
+            self._title(MSG_PLAY_WRONG)
+            self._menu(STATE_PLAY, MSG_MENU_PLAY, MSG_PLAY_INPUT_EXPR)
+            return
+
+        hand.solved()
+        if not hand.is_answer(expr) and hand.complete():
+            self._title(MSG_PLAY_FIND_BUG)
+        else:
+            self._title(MSG_PLAY_RIGHT)
+        self._menu(STATE_PLAY_RIGHT, MSG_MENU_PLAY_RIGHT)
+
+    def _play_choice(self, hand, r):
+        if r in '2h' and hand.hint_chains:
+            # show a hint, hints are ready once an answer is found
+            hand.hinted()
+            self._title(hand.str_hint())
+            self._menu(STATE_PLAY, MSG_MENU_PLAY, MSG_PLAY_INPUT_EXPR)
+            return
+
+        elif r in '1n2h3s' and hand.searching():
+            self._title(MSG_PLAY_SEARCHING)
+            self._menu(STATE_PLAY, MSG_MENU_PLAY, MSG_PLAY_INPUT_EXPR)
+            return
+
+        elif r in '1n':
+            # no answer
+            if hand.answers or hand.truncated():
+                self._title(hand.answers and MSG_PLAY_WRONG or
+                                MSG_PLAY_TRUNCATED)
+                self._menu(STATE_PLAY, MSG_MENU_PLAY, MSG_PLAY_INPUT_EXPR)
+                return
+            hand.solved()
+            self._title(MSG_PLAY_RIGHT)
+
+        elif r in '2h':
+            # no hints
+            self._title(hand.truncated() and MSG_PLAY_TRUNCATED
+                            or MSG_PLAY_NO_ANSWER)
+
+        elif r in '3s':
+            # show the answer
+            self._title(self.str_answer(hand))
+
+        elif r in ('4b' + INPUT_EOF):
+            self._back_to_main()
+            return
+
+        elif r in '5q':
+            self._close()
+            return
+
+        # this hand is end
+        self._new_hand()
+
+    def _on_play_right(self, r):
+        r = r.lower()
+        if r == INPUT_EOF:
+            self._back_to_main()
+            return
+        elif r not in '1t2n3s4q':
+            self._print(MSG_INVALID_INPUT)
+            return
+
+        self._print()
+        hand = self.hands[-1]
+        if r in '1t':
+            self._menu(STATE_PLAY, MSG_MENU_PLAY, MSG_PLAY_INPUT_EXPR)
+            return
+
+        elif r in '3s' and hand.searching():
+            self._title(MSG_PLAY_SEARCHING)
+
+        elif r in '3s':
+            self._title(self.str_answer(hand))
+
+        elif r in '4q':
+            self._close()
+            return
+
+        self._new_hand()
+
+    def _on_closed(self, r):
+        pass
@@ -3,83 +3,187 @@
 
 from __future__ import absolute_import, print_function, division
 
-import random
-import sys
-
-try:
-    import builtins
-    unichr = getattr(builtins, 'chr')
-    unicode = getattr(builtins, 'str')
-except ImportError:
-    pass
+import threading
+import time
 
 from . import calc
+# Card and the suits moved to the deck module, kept as game.Card
+from .deck import (Card, Deck, deck_cards, CARD_SPADES, CARD_HEARTS,
+                    CARD_DIAMONDS, CARD_CLUBS)
+
+
+# the player of the recorded hands if it's not given
+DEFAULT_PLAYER = 'anonymous'
 
 
 HAND_RESULT_SOLVED = 's'
 HAND_RESULT_HINTED = 'h'
 HAND_RESULT_FAILED = 'f'
 
-CARD_SPADES = 0x1f0a1
-CARD_HEARTS = 0x1f0b1
-CARD_DIAMONDS = 0x1f0c1
-CARD_CLUBS = 0x1f0d1
-
-
-class Card(object):
-    '''card is uniquely identified by the unicode code point value (self.code)
-    self.integer is the integer value the card represents'''
-    def __init__(self, code, integer):
-        self.code = code
-        self.integer = integer
-
-    def __str__(self):
-        if sys.version < '3':
-            return unichr(self.code).encode('utf-8')
-        else:
-            return unichr(self.code)
-
-    def __unicode__(self):
-        return unichr(self.code)
-
-    def __repr__(self):
-        return repr(self.__unicode__())
-
-
 class Hand(object):
     '''a hand is a number of cards the program randomly generates or 
     provided by the user to compute the target, the hand also records
-    the result of user'''
-    def __init__(self, cards, target=24):
-        self.cards = cards
+    the result of user.
+    if incremental, the hand is solved by a calc.SolveSession, so it's
+    solved again fast after a card is replaced or added, but only some of
+    the answers are found.
+    if background, the hand is solved by a thread of its own, or by the
+    executor (a concurrent.futures.Executor) if it's given'''
+    def __init__(self, cards, target=24, timeout=None, background=False,
+                    incremental=False, executor=None):
+        self.cards = list(cards)
         self.target = target
+        self.timeout = timeout
+        self.background = background or executor is not None
+        self.executor = executor
 
-        self.integers = [c.integer for c in cards]
-        self.answers = calc.solve(self.integers, target)
+        self.integers = [c.integer for c in self.cards]
         self.result = HAND_RESULT_FAILED
 
-        self._hinti = 0
         self._hinted = False
 
+        self.hints = 0
+        self.started = time.time()
+        self.seconds = None
+        self.ended = None
+
+        self._session = None
+        if incremental:
+            self._session = calc.SolveSession(self.integers)
+        self._cancel = calc.CancelToken()
+        self._thread = None
+        self._future = None
+        self._start_solve()
+
+    def _start_solve(self):
+        self.answers = calc.Solutions()
+        self._answer_keys = set()
+        # the hint chains of the answers, available while searching
+        self.hint_chains = []
+        self._hinti = 0
+
+        if self.executor is not None:
+            self._future = self.executor.submit(self._solve, self._cancel)
+        elif self.background:
+            # deal the hand immediately, the answers are set when found
+            self._thread = threading.Thread(target=self._solve,
+                                            args=(self._cancel,))
+            self._thread.daemon = True
+            self._thread.start()
+        else:
+            self._solve(self._cancel)
+
+    def _solve(self, cancel):
+        if self._session is not None:
+            self.answers = self._session.solve(self.target, self.timeout,
+                                                cancel, self._found)
+        else:
+            self.answers = calc.solve(self.integers, self.target,
+                                        self.timeout, cancel, self._found)
+
+    def _found(self, expr):
+        self._answer_keys.add(expr.canonical_key())
+        self.hint_chains.append(expr.hint_chain())
+
+    def _stop(self):
+        '''stop solving the current cards'''
+        self.cancel()
+        # the session and the answers are left alone after joined
+        if self._thread is not None:
+            self._thread.join()
+        if self._future is not None and not self._future.cancel():
+            self._future.exception()
+        self._cancel = calc.CancelToken()
+
+    def _change(self, cards):
+        '''solve the new cards'''
+        self.cards = cards
+        self.integers = [c.integer for c in cards]
+        self._start_solve()
+
+    def replace_card(self, old, new):
+        '''replace the card old of the hand with the card new, and solve
+        the hand again'''
+        self._stop()
+        cards = self.cards[:]
+        cards[cards.index(old)] = new
+        if self._session is not None:
+            self._session.replace(old.integer, new.integer)
+        self._change(cards)
+
+    def add_card(self, card):
+        '''add a card to the hand, and solve the hand again'''
+        self._stop()
+        if self._session is not None:
+            self._session.add(card.integer)
+        self._change(self.cards + [card])
+
+    def remove_card(self, card):
+        '''remove a card from the hand, and solve the hand again'''
+        self._stop()
+        cards = self.cards[:]
+        cards.remove(card)
+        if self._session is not None:
+            self._session.remove(card.integer)
+        self._change(cards)
+
+    def searching(self):
+        '''check if the answers are still being searched in background'''
+        if self._future is not None:
+            return not self._future.done()
+        return self._thread is not None and self._thread.is_alive()
+
+    def truncated(self):
+        '''check if the search was stopped before all answers found'''
+        return self.answers.truncated
+
+    def complete(self):
+        '''check if all the answers are found, so an expr computing the
+        target must be one of them'''
+        return (self._session is None and not self.searching() and
+                not self.truncated())
+
+    def cancel(self):
+        '''stop searching the answers'''
+        self._cancel.cancel()
+
+    def end(self):
+        self.cancel()
+        self.ended = time.time()
+
     def str_cards(self):
         return '  '.join([str(card) for card in self.cards])
 
     def str_answer(self):
         return '\n'.join([str(expr) for expr in self.answers])
 
-    def str_hint(self):
-        if self.answers:
-            if self._hinti == len(self.answers):
-                self._hinti = 0
-            hint = self.answers[self._hinti].str_hint()
-            self._hinti += 1
-            return hint
-        return ''
+    def str_hint(self, progressive=False):
+        '''return the first step of an answer, a different answer each time.
+        if progressive, return the next step of the first answer instead'''
+        chains = self.hint_chains[:]
+        if not chains:
+            return ''
+
+        if progressive:
+            hint = chains[0][min(self._hinti, len(chains[0]) - 1)]
+        else:
+            hint = chains[self._hinti % len(chains)][0]
+        self._hinti += 1
+        return hint
+
+    def is_answer(self, expr):
+        '''check if the expr is one of the answers in canonical form'''
+        return calc.canonical_key(expr) in self._answer_keys
 
     def hinted(self):
         self._hinted = True
+        self.hints += 1
 
     def solved(self):
+        if self.seconds is None:
+            # the time of the first solution
+            self.seconds = time.time() - self.started
+
         if self._hinted:
             self.result = HAND_RESULT_HINTED
         else:
@@ -87,49 +191,75 @@ class Hand(object):
 
 
 class Game(object):
-    '''24 game with one set of playing cards'''
+    '''24 game with one set of playing cards.
+    the cards are dealt by a deck.Deck seeded with seed, so the hands of
+    all the sets of a game are the same for the same seed'''
 
-    def __init__(self, target=24, count=4, face2ten=False):
+    def __init__(self, target=24, count=4, face2ten=False, timeout=None,
+                    background=False, store=None, player=None, executor=None,
+                    seed=None):
         self.target = target
         self.count = count
         self.face2ten = face2ten
+        self.timeout = timeout
+        self.background = background
+        # the hands are solved by the executor if it's given, see Hand
+        self.executor = executor
+
+        # the ended hands are recorded to the store (see store.StatsStore)
+        self.store = store
+        self.player = player
+        if store is not None and not player:
+            self.player = DEFAULT_PLAYER
 
         self.seti = 0
+        self.hands = []
+        # the deck is shuffled when it's created, reset shuffles it again
+        # from the second set on
+        self.deck = Deck(deck_cards(face2ten), seed)
 
         self.reset()
 
+    @property
+    def cards(self):
+        '''the cards not dealt in the set'''
+        return self.deck.remaining()
+
     def reset(self):
-        self.cards = []
+        self.end_hand()
         self.hands = []
-
-        random.seed()
-
-        for i in range(13):
-            integer = i + 1
-            if self.face2ten and i in (10, 11, 12):
-                integer = 10
-
-            for j in (CARD_SPADES, CARD_HEARTS, CARD_DIAMONDS, CARD_CLUBS):
-                code = j + i
-                if i in (11, 12):
-                    # the card of C is not considered
-                    code += 1
-                self.cards.append(Card(code, integer))
-
+        if self.seti:
+            self.deck.shuffle()
         self.seti += 1
 
     def is_set_end(self):
-        return len(self.cards) < self.count
+        return len(self.deck) < self.count
 
     def new_hand(self):
-        if self.is_set_end():
+        self.end_hand()
+
+        cards = self.deck.draw(self.count)
+        if cards is None:
             return None
 
-        cards = []
-        for i in range(self.count):
-            idx = random.randint(0, len(self.cards) - 1)
-            cards.append(self.cards.pop(idx))
-        hand = Hand(cards, target=self.target)
+        hand = Hand(cards, target=self.target, timeout=self.timeout,
+                        background=self.background, executor=self.executor)
         self.hands.append(hand)
         return hand
 
+    def end_hand(self):
+        '''end the last hand and record it'''
+        if not self.hands or self.hands[-1].ended:
+            return
+
+        hand = self.hands[-1]
+        hand.end()
+        if self.store is not None:
+            self.store.record(self.player, hand.integers, hand.target,
+                    hand.result, hand.seconds, hand.hints, hand.ended)
+
+    def close(self):
+        self.end_hand()
+        if self.store is not None:
+            self.store.close()
+            self.store = None
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+'''a precomputed index of the answers of hands, so the answers of a hand
+can be looked up without solving it (and without importing calc)
+
+the index file is a utf-8 text file, one hand per line:
+    <target> TAB <sorted integers> [TAB <answer>[;<hint>]...]...
+the hints of an answer are the steps of its hint chain (see
+calc.Expr.hint_chain) except the last one, which is the answer itself.
+; is never in an expression (see calc.RESERVED_CHARS), unlike | which is
+an operator
+
+the lines are sorted by the keys of the hands (see hand_key), so lookup
+finds a hand by a binary search of the file, without loading it.
+
+build an index of all 4-card hands:
+    python -m game24.index index24.txt'''
+
+from __future__ import absolute_import, print_function, division
+
+import io
+import sys
+import itertools
+
+
+# the separator of an answer and its hints
+HINT_SEP = ';'
+
+# lookup scans the lines once the range of the search is within the bytes
+LOOKUP_SCAN_SIZE = 4096
+
+
+def hand_key(integers, target=24):
+    '''the index key of a hand, the order of integers doesn't matter'''
+    return (target,) + tuple(sorted(integers))
+
+
+if sys.version < '3':
+    def _native(s):
+        return s.encode('utf-8')
+
+    def _text(s):
+        return s.decode('utf-8')
+else:
+    def _native(s):
+        return s
+
+    def _text(s):
+        return s
+
+
+class SolutionIndex(object):
+    '''maps the key of a hand to the list of its answer strings'''
+    def __init__(self):
+        self.solutions = {}
+        self.hint_chains = {}
+
+    def __len__(self):
+        return len(self.solutions)
+
+    def __contains__(self, key):
+        return key in self.solutions
+
+    def get(self, integers, target=24):
+        '''return the answer strings of a hand or None if not indexed'''
+        return self.solutions.get(hand_key(integers, target))
+
+    def hints(self, integers, target=24):
+        '''return the hint chains of the answers of a hand or None'''
+        return self.hint_chains.get(hand_key(integers, target))
+
+    def hint(self, integers, target=24, i=0, step=0):
+        '''return a step of the hint chain of the i-th answer, the last step
+        if step is beyond the chain, or None if not indexed'''
+        chains = self.hint_chains.get(hand_key(integers, target))
+        if not chains:
+            return None
+        chain = chains[i % len(chains)]
+        return chain[min(step, len(chain) - 1)]
+
+    def add(self, integers, target, answers):
+        '''index the answers of a hand, either Expr or strings, the hint
+        chains are indexed with Exprs only'''
+        key = hand_key(integers, target)
+        self.solutions[key] = [str(a) for a in answers]
+        if all([hasattr(a, 'hint_chain') for a in answers]):
+            self.hint_chains[key] = [a.hint_chain() for a in answers]
+
+    def build(self, hands, target=24):
+        '''solve and index the hands'''
+        from . import calc
+        for integers in hands:
+            self.add(integers, target, calc.solve(list(integers), target))
+
+    def load(self, path):
+        with io.open(path, encoding='utf-8') as f:
+            for line in f:
+                fields = line.rstrip('\n').split('\t')
+                key = (int(fields[0]),) + tuple(
+                                [int(s) for s in fields[1].split()])
+                # an answer field is the answer followed by its hints
+                answers = [[_native(s) for s in field.split(HINT_SEP)]
+                                for field in fields[2:]]
+                self.solutions[key] = [a[0] for a in answers]
+                if not answers or any([len(a) > 1 for a in answers]):
+                    self.hint_chains[key] = [a[1:] + a[:1] for a in answers]
+        return self
+
+    def dump(self, path):
+        with io.open(path, 'w', encoding='utf-8') as f:
+            for key in sorted(self.solutions):
+                fields = [str(key[0]), ' '.join([str(i) for i in key[1:]])]
+                chains = self.hint_chains.get(key)
+                if chains:
+                    fields.extend([HINT_SEP.join(chain[-1:] + chain[:-1])
+                                    for chain in chains])
+                else:
+                    fields.extend(self.solutions[key])
+                f.write(_text('\t'.join(fields)) + u'\n')
+
+
+def _line_key(line):
+    fields = line.split(b'\t', 2)
+    return (int(fields[0]),) + tuple([int(s) for s in fields[1].split()])
+
+
+def lookup(path, integers, target=24):
+    '''return the answer strings of a hand in the index file, or None if
+    not indexed. only the lines around the hand are read, and its hints
+    are skipped, so it's much faster than load for a single hand'''
+    key = hand_key(integers, target)
+    with io.open(path, 'rb') as f:
+        f.seek(0, io.SEEK_END)
+        # the line of the key starts in [lo, hi], lo is a line start and
+        # the lines before it are of smaller keys
+        lo, hi = 0, f.tell()
+        while hi - lo > LOOKUP_SCAN_SIZE:
+            mid = (lo + hi) // 2
+            f.seek(mid)
+            f.readline()
+            start = f.tell()
+            if start >= hi:
+                break
+            line = f.readline()
+            if _line_key(line) < key:
+                lo = start + len(line)
+            else:
+                hi = start
+
+        f.seek(lo)
+        while f.tell() <= hi:
+            line = f.readline()
+            if not line:
+                break
+            line_key = _line_key(line)
+            if line_key > key:
+                break
+            elif line_key == key:
+                fields = line.decode('utf-8').rstrip(u'\n').split(u'\t')
+                return [_native(s.split(HINT_SEP, 1)[0])
+                        for s in fields[2:]]
+    return None
+
+
+def all_hands(count=4, high=13):
+    '''all distinct hands of count integers from 1 to high'''
+    return itertools.combinations_with_replacement(range(1, high + 1), count)
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(
+            description='Build the answer index of all hands')
+    parser.add_argument('-c', type=int, default=4, dest='count',
+            help='the number of integers of a hand, default=4')
+    parser.add_argument('-N', action='store_true', dest='face2ten',
+            help='integers up to 10 instead of 13')
+    parser.add_argument('-t', type=int, default=24, dest='target',
+            help='the game target, default=24')
+    parser.add_argument('path')
+    r = parser.parse_args()
+
+    index = SolutionIndex()
+    index.build(all_hands(r.count, r.face2ten and 10 or 13), r.target)
+    index.dump(r.path)
+    print('%d hands indexed to %s' % (len(index), r.path))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+'''serve the game over TCP, each connection plays an engine.GameSession.
+
+one asyncio loop serves all the connections, and the hands are solved by
+a pool of threads shared by all the sessions, so a process serves many
+players at once. play with any line based client:
+    python -m game24.server --port 2424
+    nc localhost 2424
+
+it needs Python 3.7+ (asyncio)'''
+
+from __future__ import absolute_import, print_function, division
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from .engine import GameSession, INPUT_EOF
+
+
+DEFAULT_PORT = 2424
+# a hand is never searched for too long by a server
+DEFAULT_TIMEOUT = 10.0
+
+
+class GameServer(object):
+    '''the options of the sessions, and the executor shared by them.
+    with a seed, the n-th connection is dealt by the seed + n, so the
+    hands of a load test are the same every run'''
+    def __init__(self, target=24, count=4, face2ten=False,
+                    timeout=DEFAULT_TIMEOUT, store=None, workers=4,
+                    seed=None):
+        self.target = target
+        self.count = count
+        self.face2ten = face2ten
+        self.timeout = timeout
+        self.store = store
+        self.executor = ThreadPoolExecutor(workers)
+        self.seed = seed
+        self.sessions = 0
+        self.connections = 0
+
+    async def handle(self, reader, writer):
+        '''play a session with a connection'''
+        peer = writer.get_extra_info('peername')
+        seed = None
+        if self.seed is not None:
+            seed = self.seed + self.connections
+        self.connections += 1
+        session = GameSession(self.target, self.count, self.face2ten,
+                    timeout=self.timeout, store=self.store,
+                    player=peer and str(peer[0]) or 'anonymous',
+                    executor=self.executor, seed=seed)
+        self.sessions += 1
+        try:
+            output = session.start()
+            while not session.closed:
+                writer.write((output + session.prompt).encode('utf-8'))
+                await writer.drain()
+
+                line = await reader.readline()
+                line = line and line.decode('utf-8', 'replace') or INPUT_EOF
+                output = session.feed(line)
+                while session.pending is not None:
+                    await asyncio.wrap_future(session.pending)
+                    output += session.resume()
+
+            writer.write(output.encode('utf-8'))
+            await writer.drain()
+
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+
+        finally:
+            self.sessions -= 1
+            session.end_hand()
+            writer.close()
+
+    def start(self, host='localhost', port=DEFAULT_PORT):
+        '''return the coroutine to start serving, see asyncio.start_server'''
+        return asyncio.start_server(self.handle, host, port)
+
+    async def serve_forever(self, host='localhost', port=DEFAULT_PORT):
+        s = await self.start(host, port)
+        print('Serving on %s:%d' % (host, port))
+        async with s:
+            await s.serve_forever()
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        if self.store is not None:
+            self.store.close()
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Serve the 24 Game')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('-c', type=int, default=4, dest='count',
+            help='the number of integers to play with, default=4')
+    parser.add_argument('-j', type=int, default=4, dest='workers',
+            help='the number of threads solving the hands, default=4')
+    parser.add_argument('-N', action='store_true', dest='face2ten',
+            help='set J Q K to 10, default=11,12,13')
+    parser.add_argument('--seed', type=int, dest='seed',
+            help='deal the n-th connection with the seed + n, default=random')
+    parser.add_argument('--stats', dest='stats', metavar='FILE',
+            help='record the played hands to the SQLite database')
+    parser.add_argument('-t', type=int, default=24, dest='target',
+            help='the game target, default=24')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT,
+            metavar='SECONDS',
+            help='stop searching answers of a hand after the seconds, '
+                 'default=%s' % DEFAULT_TIMEOUT)
+    r = parser.parse_args()
+
+    store = None
+    if r.stats:
+        from .store import StatsStore
+        store = StatsStore(r.stats)
+    server = GameServer(r.target, r.count, r.face2ten, r.timeout, store,
+                        r.workers, r.seed)
+
+    try:
+        asyncio.run(server.serve_forever(r.host, r.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+'''the persistent history and statistics of played hands
+
+every ended hand is a record appended to a log file (JSON lines) and
+inserted to a SQLite database (in WAL mode) for the queries. the records
+are written in batches by a background thread, so recording a hand never
+blocks the game. the log is the source of truth, the database can be
+rebuilt from it:
+    python -m game24.store replay <log> <db>
+    python -m game24.store leaderboard <db>'''
+
+from __future__ import absolute_import, print_function, division
+
+import io
+import json
+import sqlite3
+import sys
+import threading
+import time
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+
+BATCH_SIZE = 500
+BATCH_WAIT = 1.0
+
+FIELDS = ('player', 'hand', 'target', 'result', 'seconds', 'hints', 'ended')
+
+SQL_SCHEMA = (
+    '''CREATE TABLE IF NOT EXISTS hands (
+        player TEXT NOT NULL,
+        hand TEXT NOT NULL,
+        target INTEGER NOT NULL,
+        result TEXT NOT NULL,
+        seconds REAL,
+        hints INTEGER NOT NULL,
+        ended REAL NOT NULL)''',
+    'CREATE INDEX IF NOT EXISTS hands_player ON hands (player, ended)',
+    'CREATE INDEX IF NOT EXISTS hands_hand ON hands (hand, target)',
+)
+
+SQL_INSERT = 'INSERT INTO hands (%s) VALUES (%s)' % (
+                    ', '.join(FIELDS), ', '.join(['?'] * len(FIELDS)))
+
+SQL_LEADERBOARD = '''SELECT player, COUNT(*),
+        SUM(result = 's'), SUM(result = 'h'), AVG(seconds)
+    FROM hands GROUP BY player
+    ORDER BY SUM(result = 's') DESC, AVG(seconds) LIMIT ?'''
+
+SQL_HAND_STATS = '''SELECT COUNT(*),
+        SUM(result = 's'), SUM(result = 'h'), AVG(seconds), SUM(hints)
+    FROM hands WHERE hand = ? AND target = ?'''
+
+SQL_HISTORY = '''SELECT %s FROM hands WHERE player = ?
+    ORDER BY ended DESC LIMIT ?''' % ', '.join(FIELDS)
+
+
+def hand_str(integers):
+    '''the hand column, the order of integers doesn't matter'''
+    return ' '.join([str(i) for i in sorted(integers)])
+
+
+def connect(db_path, check_same_thread=True):
+    conn = sqlite3.connect(db_path, check_same_thread=check_same_thread)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    for sql in SQL_SCHEMA:
+        conn.execute(sql)
+    return conn
+
+
+def insert(conn, records):
+    with conn:
+        conn.executemany(SQL_INSERT,
+                [tuple([r[f] for f in FIELDS]) for r in records])
+
+
+class StatsStore(object):
+    '''records hands in background, and queries the statistics'''
+    def __init__(self, db_path, log_path=None):
+        self.db_path = db_path
+        self.log_path = log_path or db_path + '.log'
+
+        # the number of records failed to write, and the last error
+        self.errors = 0
+        self.error = None
+
+        self._queue = queue.Queue()
+        # the queries may come from the threads of an executor (see
+        # engine.GameSession), one at a time
+        self._conn = connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._writer = threading.Thread(target=self._write)
+        self._writer.daemon = True
+        self._writer.start()
+
+    def record(self, player, integers, target, result, seconds, hints,
+                    ended):
+        '''queue a record of an ended hand, it returns immediately'''
+        if not player:
+            # checked here, the writer thread can't tell the caller
+            raise ValueError('A record needs a player')
+        self._queue.put({'player': player, 'hand': hand_str(integers),
+            'target': target, 'result': result, 'seconds': seconds,
+            'hints': hints, 'ended': ended})
+
+    def _write(self):
+        # the writer thread owns its connection and the log file
+        conn = connect(self.db_path)
+        log = io.open(self.log_path, 'a', encoding='utf-8')
+        while True:
+            records = [self._queue.get()]
+            deadline = time.time() + BATCH_WAIT
+            while records[-1] is not None and len(records) < BATCH_SIZE:
+                try:
+                    records.append(self._queue.get(
+                            timeout=max(0, deadline - time.time())))
+                except queue.Empty:
+                    break
+
+            closing = records[-1] is None
+            records = [r for r in records if r is not None]
+            try:
+                if records:
+                    log.write(u''.join([u'%s\n' % json.dumps(r,
+                                sort_keys=True) for r in records]))
+                    log.flush()
+                    insert(conn, records)
+            except Exception as e:
+                # keep writing the next batches, and never leave flush
+                # waiting for a batch which failed
+                self.errors += len(records)
+                self.error = e
+                print('Failed to write %d records: %s' % (len(records), e),
+                        file=sys.stderr)
+            finally:
+                for i in range(len(records) + closing):
+                    self._queue.task_done()
+
+            if closing:
+                log.close()
+                conn.close()
+                return
+
+    def flush(self):
+        '''wait until all queued records are written'''
+        self._queue.join()
+
+    def close(self):
+        self._queue.put(None)
+        self._writer.join()
+        self._conn.close()
+
+    def leaderboard(self, limit=10):
+        '''a list of (player, hands, solved, solved with hint, average
+        seconds to solve) ordered by the solved hands'''
+        self.flush()
+        with self._lock:
+            return self._conn.execute(SQL_LEADERBOARD, (limit,)).fetchall()
+
+    def hand_stats(self, integers, target=24):
+        '''(played, solved, solved with hint, average seconds to solve,
+        total hints) of a hand by all players'''
+        self.flush()
+        with self._lock:
+            return self._conn.execute(SQL_HAND_STATS,
+                                (hand_str(integers), target)).fetchone()
+
+    def history(self, player, limit=20):
+        '''the latest records of a player'''
+        self.flush()
+        with self._lock:
+            rows = self._conn.execute(SQL_HISTORY,
+                                        (player, limit)).fetchall()
+        return [dict(zip(FIELDS, row)) for row in rows]
+
+
+def replay(log_path, db_path):
+    '''rebuild the database from the log, return the number of records'''
+    conn = connect(db_path)
+    with conn:
+        conn.execute('DELETE FROM hands')
+
+    count = 0
+    with io.open(log_path, encoding='utf-8') as f:
+        while True:
+            lines = f.readlines(1 << 20)
+            if not lines:
+                break
+            records = [json.loads(line) for line in lines if line.strip()]
+            insert(conn, records)
+            count += len(records)
+    conn.close()
+    return count
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='The game statistics')
+    subparsers = parser.add_subparsers(dest='command')
+    p = subparsers.add_parser('replay', help='rebuild the database from log')
+    p.add_argument('log')
+    p.add_argument('db')
+    p = subparsers.add_parser('leaderboard', help='show the leaderboard')
+    p.add_argument('-n', type=int, default=10, dest='limit')
+    p.add_argument('db')
+    r = parser.parse_args()
+
+    if r.command == 'replay':
+        print('%d records replayed' % replay(r.log, r.db))
+
+    elif r.command == 'leaderboard':
+        conn = connect(r.db)
+        for row in conn.execute(SQL_LEADERBOARD, (r.limit,)):
+            print('%-16s %6d hands %6d solved %6d with hint  %s' % (
+                    row[0], row[1], row[2], row[3],
+                    row[4] is not None and '%.1fs' % row[4] or '-'))
+
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+'''profiling and span timing for the command line, see --profile
+
+spans time the calls of a few functions (calc.solve, calc.parse,
+Hand.__init__ and the input loop of GameConsole) by wrapping them only
+while profiling, so they cost nothing otherwise. a profile run writes:
+    OUT             the pstats of cProfile (not with --profiler sample)
+    OUT.collapsed   the sampled stacks, one "frame;frame;... count" per
+                    line, the input of flamegraph.pl and speedscope
+and prints the spans and the top functions to the stderr'''
+
+from __future__ import absolute_import, print_function, division
+
+import functools
+import os
+import sys
+import threading
+import time
+
+
+PROFILER_CPROFILE = 'cprofile'
+PROFILER_SAMPLE = 'sample'
+
+SAMPLE_INTERVAL = 0.001
+
+# (module, class or None, attribute, span name)
+SPANS = (
+    ('game24.calc', None, 'solve', 'calc.solve'),
+    ('game24.calc', None, 'parse', 'calc.parse'),
+    ('game24.game', 'Hand', '__init__', 'Hand.__init__'),
+    ('game24.console', 'GameConsole', 'input_loop', 'GameConsole.input_loop'),
+    ('game24.console', 'GameConsole', 'raw_input_ex', 'GameConsole.input'),
+    ('game24.engine', 'GameSession', 'feed', 'GameSession.feed'),
+)
+
+
+class Spans(object):
+    '''the calls, total and max seconds of each span name'''
+    def __init__(self):
+        self.spans = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds):
+        with self._lock:
+            span = self.spans.setdefault(name, [0, 0.0, 0.0])
+            span[0] += 1
+            span[1] += seconds
+            span[2] = max(span[2], seconds)
+
+    def traced(self, name, func):
+        '''return func wrapped to time its calls as the span'''
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(name, time.time() - start)
+        return wrapper
+
+    def report(self, out=sys.stderr):
+        print('%-24s %8s %12s %10s %10s' % ('span', 'calls', 'total ms',
+                                            'mean ms', 'max ms'), file=out)
+        for name, (calls, total, longest) in sorted(self.spans.items()):
+            print('%-24s %8d %12.2f %10.3f %10.3f' % (name, calls,
+                    total * 1e3, total / calls * 1e3, longest * 1e3),
+                    file=out)
+
+
+def install(spans):
+    '''wrap the functions of SPANS, return a function to unwrap them'''
+    undo = []
+    for module, cls, attr, name in SPANS:
+        __import__(module)
+        owner = sys.modules[module]
+        if cls is not None:
+            owner = getattr(owner, cls)
+
+        orig = owner.__dict__[attr]
+        if isinstance(orig, staticmethod):
+            wrapped = staticmethod(spans.traced(name, orig.__func__))
+        else:
+            wrapped = spans.traced(name, orig)
+        setattr(owner, attr, wrapped)
+        undo.append((owner, attr, orig))
+
+    def uninstall():
+        for owner, attr, orig in reversed(undo):
+            setattr(owner, attr, orig)
+    return uninstall
+
+
+def frame_name(code):
+    return '%s (%s:%d)' % (code.co_name, os.path.basename(code.co_filename),
+                            code.co_firstlineno)
+
+
+class Sampler(object):
+    '''a sampling profiler, a thread takes the stacks of all the other
+    threads every interval and counts them as collapsed stacks'''
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = {}
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample)
+        self._thread.daemon = True
+
+    def start(self):
+        # let the sampler take the GIL about every interval
+        self._switch = getattr(sys, 'getswitchinterval', None) and \
+                            sys.getswitchinterval()
+        if self._switch:
+            sys.setswitchinterval(self.interval)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        if self._switch:
+            sys.setswitchinterval(self._switch)
+
+    def _sample(self):
+        ident = self._thread.ident
+        names = {}
+        while not self._stop.wait(self.interval):
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(frame_name(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                stack = ';'.join(reversed(stack))
+                self.stacks[stack] = self.stacks.get(stack, 0) + 1
+            self.samples += 1
+
+    def dump(self, path):
+        with open(path, 'w') as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write('%s %d\n' % (stack, count))
+
+
+def run(func, args, out, profiler=PROFILER_CPROFILE, report=sys.stderr):
+    '''call func(args) under the profiler with the spans, and write the
+    outputs even if func exits by sys.exit or an exception'''
+    spans = Spans()
+    uninstall = install(spans)
+    sampler = Sampler()
+    prof = None
+    if profiler == PROFILER_CPROFILE:
+        import cProfile
+        prof = cProfile.Profile()
+
+    sampler.start()
+    if prof is not None:
+        prof.enable()
+    try:
+        return func(args)
+    finally:
+        if prof is not None:
+            prof.disable()
+        sampler.stop()
+        uninstall()
+
+        print(file=report)
+        spans.report(report)
+        sampler.dump(out + '.collapsed')
+        print('%d samples written to %s.collapsed' % (sampler.samples, out),
+                file=report)
+        if prof is not None:
+            import pstats
+            prof.dump_stats(out)
+            print('pstats written to %s' % out, file=report)
+            pstats.Stats(prof, stream=report).sort_stats(
+                                            'cumulative').print_stats(15)
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+'''a brute-force reference of the solver: the exact rational values of all
+expression trees over all permutations of the integers, with signed
+intermediate values and no canonicalization at all'''
+
+from __future__ import absolute_import, print_function, division
+
+from fractions import Fraction
+
+
+_cache = {}
+
+def all_values(integers):
+    '''all values of the expressions using each integer exactly once.
+    the root of a tree splits the integers into a left and a right part,
+    every ordered split is tried, which covers all trees and permutations'''
+    integers = tuple(sorted(integers))
+    if len(integers) == 1:
+        return set([Fraction(integers[0])])
+
+    if integers in _cache:
+        return _cache[integers]
+
+    values = set()
+    count = len(integers)
+    for mask in range(1, (1 << count) - 1):
+        left = [integers[i] for i in range(count) if mask & (1 << i)]
+        right = [integers[i] for i in range(count) if not mask & (1 << i)]
+        rights = all_values(right)
+        for a in all_values(left):
+            for b in rights:
+                values.update((a + b, a - b, a * b))
+                if b:
+                    values.add(a / b)
+    _cache[integers] = values
+    return values
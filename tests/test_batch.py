@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, print_function, division
+
+import io
+import json
+
+from game24 import batch, calc
+from game24.index import SolutionIndex
+
+
+def test_write_answers():
+    answers = calc.solve([1, 2, 3, 4])
+    out = io.StringIO()
+    batch.write_answers(out, answers)
+    assert out.getvalue().splitlines() == [str(e) for e in answers]
+
+    out = io.StringIO()
+    batch.write_answers(out, answers, batch.FORMAT_JSONL, calc.STYLE_RPN)
+    assert json.loads(out.getvalue()) == [e.format(calc.STYLE_RPN)
+                                            for e in answers]
+
+    out = io.StringIO()
+    batch.write_answers(out, [])
+    assert out.getvalue() == ''
+
+
+def test_run_style():
+    out = io.StringIO()
+    batch.run([u'3 3 8 8\n', u'1+2\n', u'1 1 1 1\n'], out,
+                style=calc.STYLE_ASCII)
+    assert out.getvalue().splitlines() == [
+                u'3 3 8 8\t8 / (3 - 8 / 3)', u'1+2\t3', u'1 1 1 1']
+
+
+def test_run_timeout():
+    out = io.StringIO()
+    batch.run([u'1 2 3 4 5 6 7\n', u'1 1 1 1\n'], out, timeout=0.05)
+    lines = out.getvalue().splitlines()
+    assert lines[0].endswith(u'\t' + batch.TSV_TRUNCATED)
+    assert lines[1] == u'1 1 1 1'
+
+    out = io.StringIO()
+    batch.run([u'1 2 3 4 5 6 7\n', u'3 3 8 8\n'], out, fmt=batch.FORMAT_JSONL,
+                style=calc.STYLE_RPN, timeout=0.05)
+    results = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert results[0]['truncated'] is True
+    assert 'truncated' not in results[1]
+
+
+
+def test_run_operators():
+    for jobs in (1, 2):
+        out = io.StringIO()
+        batch.run([u'2 4\n', u'2|4\n'], out, jobs=jobs, operators=['|'])
+        assert out.getvalue().splitlines() == [u'2 4\t2|4', u'2|4\t24']
+
+    # the index of + - * / isn't used with the extra operators
+    index = SolutionIndex()
+    index.add([2, 4], 24, [])
+    cache = batch.ResultCache(index, operators=['|'])
+    assert cache.answers([2, 4], 24) == ['2|4']
+    assert batch.ResultCache(index).answers([2, 4], 24) == []
+
+
+def test_run_bounds():
+    for jobs in (1, 2):
+        out = io.StringIO()
+        batch.run([u'13 13 13 1 61\n'], out, target=36, jobs=jobs,
+                    bounds=calc.Bounds(1000))
+        assert out.getvalue().splitlines() == [u'13 13 13 1 61']
+
+    out = io.StringIO()
+    batch.run([u'13 13 13 1 61\n'], out, target=36)
+    assert out.getvalue().splitlines() == [
+                u'13 13 13 1 61\t(13 × 13 × 13 - 1) ÷ 61']
@@ -0,0 +1,419 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, print_function, division
+
+import itertools
+import random
+import threading
+
+import pytest
+
+from game24 import calc
+
+from reference import all_values
+
+
+HANDS4 = list(itertools.combinations_with_replacement(range(1, 14), 4))
+
+rand = random.Random(24)
+HANDS5 = [sorted([rand.randint(1, 13) for i in range(5)]) for j in range(6)]
+
+
+def check_answers(integers, target, answers):
+    keys = set()
+    for expr in answers:
+        assert expr.value == target
+        assert sorted(expr.get_integers()) == sorted(integers)
+
+        # the printed answer parses back to the same expression
+        parsed = calc.parse(str(expr))
+        assert parsed.value == expr.value
+        assert calc.canonical_key(parsed) == calc.canonical_key(expr)
+        assert str(parsed) == str(expr)
+
+        keys.add(calc.canonical_key(expr))
+    assert len(keys) == len(answers)
+
+
+@pytest.mark.parametrize('chunk', range(0, len(HANDS4), 260))
+def test_solve_all_4_card_hands(chunk):
+    for integers in HANDS4[chunk:chunk + 260]:
+        values = all_values(integers)
+        answers = calc.solve(list(integers))
+        assert bool(answers) == (24 in values), integers
+        assert not answers.truncated
+        check_answers(integers, 24, answers)
+
+
+@pytest.mark.parametrize('integers', HANDS5)
+def test_solve_5_card_hands(integers):
+    values = all_values(integers)
+    answers = calc.solve(integers)
+    assert bool(answers) == (24 in values)
+    check_answers(integers, 24, answers)
+
+    # the search only keeps non-negative values
+    assert calc.reachable(integers) == set([abs(v) for v in values])
+
+
+@pytest.mark.parametrize('target', [1, 10, 36, 100])
+def test_solve_other_targets(target):
+    for integers in HANDS4[::37]:
+        answers = calc.solve(list(integers), target)
+        assert bool(answers) == (target in all_values(integers))
+        check_answers(integers, target, answers)
+
+
+def test_reachable_all_4_card_hands():
+    for integers in HANDS4:
+        values = set([abs(v) for v in all_values(integers)])
+        assert calc.reachable(integers) == values, integers
+        assert calc.solvable(integers) == (24 in values)
+
+
+def test_canonical_key():
+    same = ['8/(3-8/3)', '8 ÷ (3 - 8 ÷ 3)', '8/(3-(8/3))', '(8)/(3-8/3)']
+    keys = set([calc.canonical_key(s) for s in same])
+    assert len(keys) == 1
+
+    assert calc.canonical_key('1+2+3') == calc.canonical_key('3+(2+1)')
+    assert calc.canonical_key('4*3-2') == calc.canonical_key('3*4-2')
+    assert calc.canonical_key('4*3/2') == calc.canonical_key('4/2*3')
+    assert calc.canonical_key('1/1') == calc.canonical_key('1*1')
+    assert calc.canonical_key('4-0') == calc.canonical_key('4+0')
+
+    assert calc.canonical_key('1+2*3') != calc.canonical_key('(1+2)*3')
+    assert calc.canonical_key('8-4') != calc.canonical_key('8/4')
+    assert calc.canonical_key('2*2') != calc.canonical_key('2+2')
+
+
+@pytest.mark.parametrize('s,value', [
+    ('1+2*3', 7),
+    ('(1+2)*3', 9),
+    ('8/(3-8/3)', 24),
+    ('2-3', -1),
+    ('1/0', None),
+    ('12 / 8', calc.Fraction(3, 2)),
+    ('2*(3+4)*5', 70),
+    ('10-2-3', 5),
+    ('10/2/5', 1),
+])
+def test_parse(s, value):
+    assert calc.parse(s).value == value
+
+
+@pytest.mark.parametrize('s', ['', '1', '1+', '(1+2', '1+2)', '1 2', 'x+1',
+                                '-1', '1*-2'])
+def test_parse_invalid(s):
+    with pytest.raises(ValueError):
+        calc.parse(s)
+
+
+def test_solve_timeout():
+    answers = calc.solve([1, 2, 3, 4, 5, 6, 7], timeout=0.05)
+    assert answers.truncated
+
+    cancel = calc.CancelToken()
+    cancel.cancel()
+    answers = calc.solve([1, 2, 3, 4], cancel=cancel)
+    assert answers.truncated and not answers
+    assert calc.solvable([1, 2, 3, 4], cancel=cancel) is None
+
+
+def test_pack():
+    values = [(8, 3), (3, 1), (2 ** 70, 1)]
+    assert calc.unpack_values(calc.pack_values(values)) == sorted(values)
+
+
+def test_pack_values_long(monkeypatch):
+    # the typecode before Python 3.3
+    monkeypatch.setattr(calc, 'VALUE_TYPECODE', 'l')
+    for values in ([(8, 3), (3, 1)], [(2 ** 70, 1)]):
+        assert calc.unpack_values(calc.pack_values(values)) == sorted(values)
+
+
+@pytest.mark.parametrize('s,chain', [
+    ('8/(3-8/3)', ['8 ÷ 3', '3 - 8 ÷ 3', '8 ÷ (3 - 8 ÷ 3)']),
+    ('1+2+3+4', ['1 + 2', '1 + 2 + 3', '1 + 2 + 3 + 4']),
+    ('(1+3)*(2+4)', ['1 + 3', '2 + 4', '(1 + 3) × (2 + 4)']),
+])
+def test_hint_chain(s, chain):
+    expr = calc.parse(s)
+    assert expr.hint_chain() == chain
+    assert calc.parse(chain[0]).value == calc.parse(expr.str_hint()).value
+
+
+def test_expr_create_key():
+    numbers = [calc.Number(i) for i in (0, 1, 3, 8)] + [calc.parse(s) for s in
+                ('8/3', '3-1', '3*8', '8-3-1', '1/8/3', '3+8')]
+    for x, y in itertools.product(numbers, repeat=2):
+        for opr in calc.OPERATORS:
+            expr = calc.expr_create(x, opr, y)
+            if expr is None:
+                assert calc.opr_value(x.value, opr, y.value) is None
+                continue
+            assert expr.value == calc.opr_value(x.value, opr, y.value)
+            # the cached key equals the key computed from the rands
+            key = expr.canonical_key()
+            expr._key = None
+            assert expr.canonical_key() == key
+
+
+def test_search_stats():
+    stats = calc.SearchStats()
+    calc.solve([1, 1, 1, 1], stats=stats)
+    # only one distinct pair of the initial state
+    assert stats.pairs < stats.pairs + stats.pairs_skipped
+    assert stats.states <= stats.oprs
+
+
+@pytest.mark.parametrize('target', [0, 1, 24, 100])
+def test_solve_mitm(target):
+    solver = calc.SubsetSolver()
+    for integers in HANDS4[::7]:
+        answers = solver.solve(list(integers), target)
+        assert bool(answers) == calc.solvable(integers, target), integers
+        check_answers(integers, target, answers)
+
+
+@pytest.mark.parametrize('integers', HANDS5)
+def test_solve_mitm_5_card_hands(integers):
+    answers = calc.solve(integers, engine=calc.ENGINE_MITM)
+    assert bool(answers) == (24 in all_values(integers))
+    check_answers(integers, 24, answers)
+
+    answers = calc.solve(integers, engine=calc.ENGINE_MITM, limit=1)
+    assert len(answers) <= 1
+
+
+def test_solve_mitm_large_hand():
+    answers = calc.solve([13, 1, 8, 8, 12, 11, 2, 1, 5, 7],
+                            engine=calc.ENGINE_MITM, limit=3)
+    assert len(answers) == 3 and answers.truncated
+    check_answers([13, 1, 8, 8, 12, 11, 2, 1, 5, 7], 24, answers)
+
+
+def test_solve_invalid_engine():
+    with pytest.raises(ValueError):
+        calc.solve([1, 2, 3, 4], engine='brute')
+
+
+def test_shared_answers_threads():
+    cache = dict([(integers, calc.solve(list(integers)))
+                    for integers in HANDS4[::97]])
+    expected = dict([(k, [(str(expr), expr.canonical_key()) for expr in v])
+                        for k, v in cache.items()])
+    errors = []
+
+    def worker(seed):
+        rand = random.Random(seed)
+        for i in range(20):
+            integers = rand.choice(sorted(cache))
+            numbers = [calc.Number(n) for n in reversed(integers)]
+            calc.State(numbers)
+            if [n.value for n in numbers] != list(reversed(integers)):
+                errors.append('State sorted the numbers')
+            if len(calc.solve(list(integers))) != len(cache[integers]):
+                errors.append(integers)
+            for expr, (s, key) in zip(cache[integers], expected[integers]):
+                if (str(expr) != s or expr.canonical_key() != key or
+                        calc.parse(s).canonical_key() != key):
+                    errors.append(s)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+
+
+def test_solve_session():
+    session = calc.SolveSession([1, 2, 3, 4, 5])
+    session.solve()
+    computed = session.solver.computed
+
+    # only the multisets with the new integer are computed
+    session.replace(5, 13)
+    answers = session.solve()
+    check_answers([1, 2, 3, 4, 13], 24, answers)
+    assert session.solver.computed - computed == 15
+    assert all([calc.is_submultiset(key, (1, 2, 3, 4, 13))
+                for key in session.solver.values])
+
+    computed = session.solver.computed
+    session.remove(13)
+    assert len(session.solve()) == len(calc.SubsetSolver().solve([1, 2, 3, 4]))
+    assert session.solver.computed == computed
+
+    session.add(6)
+    assert bool(session.solve()) == calc.solvable([1, 2, 3, 4, 6])
+
+
+def eval_rpn(s):
+    stack = []
+    for token in s.split():
+        if token.isdigit():
+            stack.append(calc.Fraction(int(token)))
+            continue
+        y, x = stack.pop(), stack.pop()
+        stack.append({'+': x + y, '-': x - y, '*': x * y,
+                        '/': y and x / y}[token])
+    assert len(stack) == 1
+    return stack[0]
+
+
+def test_formats():
+    expr = calc.parse('8/(3-8/3)')
+    assert expr.formats() == ['8 ÷ (3 - 8 ÷ 3)', '8 / (3 - 8 / 3)',
+                                '8 3 8 3 / - /']
+    assert expr.format(calc.STYLE_RPN) == '8 3 8 3 / - /'
+    assert str(calc.Number(7)) == calc.Number(7).format(calc.STYLE_RPN)
+
+    for integers in HANDS4[::13]:
+        for expr in calc.solve(list(integers)):
+            unicode_, ascii_, rpn = expr.formats()
+            assert str(expr) == unicode_
+            assert calc.parse(ascii_).canonical_key() == expr.canonical_key()
+            assert eval_rpn(rpn) == expr.value
+
+
+@pytest.mark.parametrize('s,value,ascii_', [
+    ('2^3', 8, '2^3'),
+    ('2^3^2', 512, '2^3^2'),
+    ('(2^3)^2', 64, '(2^3)^2'),
+    ('4!', 24, '4!'),
+    ('3!!', 720, '3!!'),
+    ('(3!)^2', 36, '3!^2'),
+    ('√9', 3, 'sqrt(9)'),
+    ('√√16', 2, 'sqrt(sqrt(16))'),
+    ('√(3!+3)', 3, 'sqrt(3 + 3!)'),
+    ('(√9)!', 6, 'sqrt(9)!'),
+    ('sqrt(4)!', 2, 'sqrt(4)!'),
+    ('√(4)!', 2, 'sqrt(4)!'),
+    ('√((2-1)!)', 1, 'sqrt((2 - 1)!)'),
+    ('√(2^4)', 4, 'sqrt(2^4)'),
+    ('2^√4', 4, '2^sqrt(4)'),
+    ('sqrt(8+8)', 4, 'sqrt(8 + 8)'),
+    ('1|2|3', 123, '1|2|3'),
+    ('1|2^2', 144, '1|2^2'),
+    ('2^(1|2)', 4096, '2^1|2'),
+    ('(1+3)!', 24, '(1 + 3)!'),
+    ('2 × 3! + √16', 16, '2 * 3! + sqrt(16)'),
+])
+def test_parse_operators(s, value, ascii_):
+    expr = calc.parse(s)
+    assert expr.value == value
+    assert expr.format(calc.STYLE_ASCII) == ascii_
+    for style in (calc.STYLE_UNICODE, calc.STYLE_ASCII):
+        parsed = calc.parse(expr.format(style))
+        assert parsed.canonical_key() == expr.canonical_key()
+
+
+@pytest.mark.parametrize('s', ['10^10', '2^(1/2)', '11!', '(1/2)!', '√8',
+                                '(1+2)|3', '1|(1/2)', '0|1'])
+def test_operator_guards(s):
+    assert calc.parse(s).value is None
+
+
+def test_expr_create_operators():
+    expr = calc.expr_create(calc.Number(2), '^', calc.Number(5))
+    assert expr.value == 32 and str(expr) == '2^5'
+    assert calc.expr_create(calc.Number(3), '!').value == 6
+    assert calc.expr_create(calc.Number(12), '!') is None
+    assert (calc.canonical_key(calc.expr_create(calc.Number(9), 'sqrt')) ==
+            calc.canonical_key('√9'))
+
+    # unary operators are nested only a few times
+    n = calc.Number(3)
+    for i in range(calc.MAX_UNARY_NESTING):
+        n = calc.expr_create(n, '!')
+    assert n is not None and calc.expr_create(n, '!') is None
+
+    with pytest.raises(ValueError):
+        calc.get_operators(['%'])
+    with pytest.raises(ValueError):
+        calc.register_operator(calc.Power())
+
+
+def test_solve_operators():
+    assert [str(e) for e in calc.solve([4], operators=['!'])] == ['4!']
+    assert not calc.solve([1, 1, 1, 1])
+    assert [str(e) for e in calc.solve([1, 1, 1, 1], operators=['!'])] == \
+            ['(1 + 1 + 1 + 1)!']
+    assert '2|4' in [str(e) for e in calc.solve([2, 4], operators=['|'])]
+
+    for integers in HANDS4[::365]:
+        answers = calc.solve(list(integers), operators=['^', '!', 'sqrt', '|'])
+        check_answers(integers, 24, answers)
+        # the answers with the basic operators are still found
+        keys = set([e.canonical_key() for e in answers])
+        for expr in calc.solve(list(integers)):
+            assert expr.canonical_key() in keys
+
+    with pytest.raises(ValueError):
+        calc.solve([1, 2, 3, 4], operators=['^'], engine=calc.ENGINE_MITM)
+
+
+def test_solve_bounds():
+    stats = calc.SearchStats()
+    answers = calc.solve([13, 13, 13, 1, 61], 36, stats=stats)
+    assert [str(e) for e in answers] == ['(13 × 13 × 13 - 1) ÷ 61']
+    # the last operations not giving the target make no states
+    assert stats.oprs_pruned > 0
+
+    bounds = calc.Bounds(1000)
+    assert not calc.solve([13, 13, 13, 1, 61], 36, bounds=bounds)
+    assert not calc.solve([13, 13, 13, 1, 61], 36, bounds=bounds,
+                            engine=calc.ENGINE_MITM)
+    # only the intermediate values are bounded, not the target
+    assert calc.solve([13, 13, 13, 1], 2198, bounds=calc.Bounds(2197))
+    assert not calc.solve([13, 13, 13, 1], 2198, bounds=calc.Bounds(2196))
+
+    bounds = calc.Bounds(10 * 24, 13)
+    for integers in HANDS4[::29]:
+        answers = calc.solve(list(integers), bounds=bounds)
+        check_answers(integers, 24, answers)
+        keys = set([e.canonical_key() for e in calc.solve(list(integers))])
+        assert set([e.canonical_key() for e in answers]) <= keys
+
+
+class Modulo(calc.Operator):
+    name = 'mod'
+    symbol = '%'
+    ascii = '%'
+
+    def value(self, x, y):
+        if not calc.is_integer(x) or not calc.is_integer(y) or y <= 0:
+            return None
+        return int(x) % int(y)
+
+
+def test_register_operator():
+    calc.register_operator(Modulo())
+    try:
+        expr = calc.expr_create(calc.Number(7), '%', calc.Number(4))
+        assert expr.value == 3 and str(expr) == '7%4'
+        assert calc.parse('7%4').canonical_key() == expr.canonical_key()
+        assert calc.parse('2 * 7 % 4').value == 6
+        assert not calc.solve([13, 5, 8])
+        answers = calc.solve([13, 5, 8], operators=['mod'])
+        assert [str(e) for e in answers] == ['8 × 13%5']
+        check_answers([13, 5, 8], 24, answers)
+    finally:
+        calc.unregister_operator('mod')
+
+    with pytest.raises(ValueError):
+        calc.parse('7%4')
+    for symbol in ('', '1^', 'a!', '+', ' ^', ';'):
+        op = Modulo()
+        op.symbol = op.ascii = symbol
+        with pytest.raises(ValueError):
+            calc.register_operator(op)
+
+
+@pytest.mark.parametrize('s', ['foo', 'sqrtx(9)', '2 sqr 3'])
+def test_parse_unknown_word(s):
+    with pytest.raises(ValueError) as e:
+        calc.parse(s)
+    assert str(e.value).startswith('Invalid token')
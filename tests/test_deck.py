@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, print_function, division
+
+import itertools
+import random
+
+from game24 import deck, game
+
+
+def test_deck_draw():
+    cards = deck.deck_cards()
+    assert len(set([card.code for card in cards])) == 52
+    assert deck.deck_cards() is cards
+    assert sorted(deck.deck_integers(True))[-16:] == [10] * 16
+
+    d = deck.Deck(cards, seed=1)
+    hands = [d.draw(5) for i in range(10)]
+    assert len(d) == 2 and d.draw(5) is None
+    assert sorted(sum(hands, []) + d.remaining(), key=id) == \
+            sorted(cards, key=id)
+
+    # the same seed deals the same cards, without the global random
+    state = random.getstate()
+    assert deck.Deck(cards, seed=1).draw(5) == hands[0]
+    assert random.getstate() == state
+
+    d.shuffle()
+    assert len(d) == 52
+
+
+def test_game_seed():
+    def play(seed):
+        g = game.Game(seed=seed)
+        sets = []
+        for i in range(2):
+            hands = []
+            while g.new_hand():
+                hands.append(g.hands[-1].integers)
+            sets.append(hands)
+            g.reset()
+        g.close()
+        return sets
+
+    sets = play(24)
+    assert len(sets[0]) == 13 and sets[0] != sets[1]
+    assert play(24) == sets
+    assert play(25) != sets
+
+
+def test_deals():
+    deals = list(itertools.islice(deck.deals(7, 5), 30))
+    assert deals == list(itertools.islice(deck.deals(7, 5), 30))
+    assert deals != list(itertools.islice(deck.deals(8, 5), 30))
+
+    # a shuffle of 52 cards deals 10 hands of 5
+    integers = sorted(deck.deck_integers())
+    for i in range(0, 30, 10):
+        dealt = sorted(sum(deals[i:i + 10], ()))
+        assert len(dealt) == 50
+        assert not [x for x in set(dealt) if dealt.count(x) >
+                    integers.count(x)]
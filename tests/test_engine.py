@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, print_function, division
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from game24 import engine, server
+
+
+def play(session, lines):
+    '''feed the lines to the session, return the outputs'''
+    outputs = [session.start()]
+    for line in lines:
+        outputs.append(session.feed(line))
+        while session.pending is not None:
+            session.pending.result()
+            outputs[-1] += session.resume()
+    return outputs
+
+
+def wait_hand(session):
+    hand = session.hands[-1]
+    while hand.searching():
+        time.sleep(0.01)
+    return hand
+
+
+@pytest.mark.parametrize('workers', [None, 2])
+def test_check_answer(workers):
+    executor = workers and ThreadPoolExecutor(workers)
+    session = engine.GameSession(executor=executor)
+    outputs = play(session, ['c', '1 2 x', '1 2 3 4', 'q'])
+    assert session.prompt == ''
+    assert session.closed
+    assert engine.MSG_INVALID_INPUT in outputs[2]
+    assert '(1 + 3) × (2 + 4)' in outputs[3]
+    assert engine.MSG_MENU_MAIN in outputs[3]
+
+
+def test_check_timeout(monkeypatch):
+    # the console has no timeout, a large hand stops at CHECK_TIMEOUT
+    monkeypatch.setattr(engine, 'CHECK_TIMEOUT', 0.2)
+    session = engine.GameSession(count=7)
+    start = time.time()
+    output = play(session, ['c', '1 2 3 4 5 6 7'])[2]
+    assert time.time() - start < 5
+    assert engine.MSG_PLAY_TRUNCATED in output
+    assert engine.MSG_MENU_MAIN in output
+    session.close()
+
+
+@pytest.mark.parametrize('workers', [None, 1])
+def test_leaderboard(tmpdir, workers):
+    from game24 import store
+    executor = workers and ThreadPoolExecutor(workers)
+    session = engine.GameSession(store=store.StatsStore(str(tmpdir.join(
+                        'stats.db'))), player='amy', executor=executor)
+    session.start()
+    # the query runs in the executor, not in feed
+    output = session.feed('4')
+    assert (session.pending is not None) == bool(workers)
+    if workers:
+        session.pending.result()
+        output += session.resume()
+    assert 'Player' in output and engine.MSG_MENU_MAIN in output
+    assert session.state == engine.STATE_MAIN
+
+    output = play(engine.GameSession(), ['l'])[1]
+    assert engine.MSG_NO_STATS in output and engine.MSG_MENU_MAIN in output
+    session.close()
+
+    # 3 still quits as before the leaderboard
+    session = engine.GameSession()
+    play(session, ['3'])
+    assert session.closed
+
+
+def test_play():
+    session = engine.GameSession(executor=ThreadPoolExecutor(1))
+    outputs = play(session, ['p'])
+    assert session.state == engine.STATE_PLAY
+    assert session.prompt == engine.MSG_PLAY_INPUT_EXPR
+    hand = wait_hand(session)
+    assert 'Hand 1: ' in outputs[1]
+
+    if not hand.answers:
+        assert engine.MSG_PLAY_RIGHT in session.feed('n')
+        return
+
+    assert engine.MSG_PLAY_WRONG in session.feed('n')
+    assert 'Invalid integer' in session.feed('99 + 1')
+    assert hand.hint_chains[0][0] in session.feed('h')
+    assert hand.hints == 1
+
+    output = session.feed(str(hand.answers[0]))
+    assert engine.MSG_PLAY_RIGHT in output
+    assert session.state == engine.STATE_PLAY_RIGHT
+
+    # next hand, then back to the main menu at the end of input
+    assert 'Hand 2: ' in session.feed('n')
+    assert engine.MSG_MENU_MAIN in session.feed(engine.INPUT_EOF)
+    session.feed(engine.INPUT_EOF)
+    assert session.closed
+    assert all([h.ended for h in session.hands])
+
+
+def test_play_cards():
+    from game24 import game
+    session = engine.GameSession()
+    play(session, ['p'])
+    session.hands[-1].end()
+    hand = game.Hand([game.Card(0, i) for i in (8, 4, 12, 11)])
+    session.hands[-1] = hand
+
+    # the extra operators of calc are not the game's
+    assert engine.MSG_INVALID_OPERATOR % '!' in session.feed('4!')
+    assert 'Invalid operator' in session.feed('(sqrt(4) + 4) * 12 / 8')
+    # 8 + 4 + 12 is 24 but leaves out 11
+    output = session.feed('8 + 4 + 12')
+    assert engine.MSG_PLAY_ALL_CARDS in output
+    assert engine.MSG_PLAY_FIND_BUG not in output
+    assert engine.MSG_PLAY_ALL_CARDS in session.feed('8 * (4 - (12 - 12))')
+    assert hand.result == game.HAND_RESULT_FAILED
+    assert session.state == engine.STATE_PLAY
+
+    output = session.feed('8 * (4 - (12 - 11))')
+    assert engine.MSG_PLAY_RIGHT in output
+    assert hand.result == game.HAND_RESULT_SOLVED
+
+
+def test_server():
+    async def client(port, lines):
+        reader, writer = await asyncio.open_connection('localhost', port)
+        for line in lines:
+            writer.write(line.encode('utf-8') + b'\n')
+        output = await reader.read()
+        writer.close()
+        return output.decode('utf-8')
+
+    async def run(s):
+        tcp = await s.start('localhost', 0)
+        port = tcp.sockets[0].getsockname()[1]
+        outputs = await asyncio.gather(*[
+                client(port, ['c', '1 2 3 4', 'p', 'h', 's', 'b', 'q'])
+                for i in range(20)])
+        tcp.close()
+        await tcp.wait_closed()
+        s.close()
+        return outputs
+
+    s = server.GameServer(workers=2)
+    for output in asyncio.run(run(s)):
+        assert '(1 + 3) × (2 + 4)' in output
+        assert 'Hand 1: ' in output
+        assert output.endswith(engine.MSG_SELECT + '\n')
+    assert s.sessions == 0
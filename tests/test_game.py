@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, print_function, division
+
+import pytest
+
+from game24 import calc, game
+
+
+def cards(*integers):
+    return [game.Card(game.CARD_SPADES + i - 1, i) for i in integers]
+
+
+@pytest.mark.parametrize('incremental', [False, True])
+def test_replace_and_add_card(incremental):
+    hand = game.Hand(cards(1, 1, 1, 1), incremental=incremental)
+    assert not hand.answers and hand.complete() != incremental
+
+    old, new = hand.cards[0], cards(8)[0]
+    hand.replace_card(old, new)
+    assert hand.integers == [8, 1, 1, 1]
+    assert [str(a) for a in hand.answers] == ['8 × (1 + 1 + 1)']
+    assert hand.is_answer(calc.parse('(1+1+1)*8'))
+    assert hand.str_hint() == '1 + 1'
+
+    hand.add_card(cards(2)[0])
+    assert sorted(hand.integers) == [1, 1, 1, 2, 8]
+    assert hand.answers
+    for expr in hand.answers:
+        assert expr.value == 24
+
+    hand.remove_card(new)
+    assert hand.integers == [1, 1, 1, 2]
+    assert not hand.answers
+
+
+def test_replace_card_background():
+    hand = game.Hand(cards(1, 2, 3, 4, 5, 6, 7), background=True,
+                        incremental=True)
+    hand.replace_card(hand.cards[-1], cards(13)[0])
+    hand._thread.join()
+    assert hand.integers[-1] == 13
+    assert hand.answers and not hand.truncated()
+
+
+def test_hand_of_generator():
+    hand = game.Hand(iter(cards(3, 3, 8, 8)))
+    assert hand.integers == [3, 3, 8, 8]
+    assert [str(a) for a in hand.answers] == ['8 ÷ (3 - 8 ÷ 3)']
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, print_function, division
+
+from game24 import calc, index
+
+
+def test_dump_and_load(tmpdir):
+    path = str(tmpdir.join('index.txt'))
+    hands = [(1, 2, 3, 4), (3, 3, 8, 8), (1, 1, 1, 1)]
+    idx = index.SolutionIndex()
+    idx.build(hands)
+    idx.dump(path)
+
+    loaded = index.SolutionIndex().load(path)
+    assert len(loaded) == 3
+    for integers in hands:
+        answers = [str(e) for e in calc.solve(list(integers))]
+        assert loaded.get(list(reversed(integers))) == answers
+        assert loaded.hints(integers) == idx.hints(integers)
+    assert loaded.get([1, 1, 1, 2]) is None
+
+    assert loaded.hint([8, 3, 8, 3]) == '8 ÷ 3'
+    assert loaded.hint([8, 3, 8, 3], step=1) == '3 - 8 ÷ 3'
+    assert loaded.hint([8, 3, 8, 3], step=9) == '8 ÷ (3 - 8 ÷ 3)'
+    assert loaded.hint([1, 1, 1, 1]) is None
+
+
+def test_dump_and_load_operators(tmpdir):
+    path = str(tmpdir.join('index.txt'))
+    idx = index.SolutionIndex()
+    idx.add((2, 4), 24, calc.solve([2, 4], operators=['|']))
+    idx.add((1, 2), 12, ['1|2'])
+    idx.dump(path)
+
+    loaded = index.SolutionIndex().load(path)
+    assert loaded.get([2, 4]) == ['2|4']
+    assert loaded.get([1, 2], 12) == ['1|2']
+
+
+def test_lookup(tmpdir):
+    path = str(tmpdir.join('index.txt'))
+    hands = list(index.all_hands(4, 13))[::5]
+    idx = index.SolutionIndex()
+    idx.build(hands)
+    idx.build(hands[:20], 10)
+    idx.dump(path)
+
+    for key in idx.solutions:
+        assert index.lookup(path, reversed(key[1:]), key[0]) == \
+                idx.solutions[key]
+    assert index.lookup(path, [1, 1, 1, 2]) is None
+    assert index.lookup(path, [13, 13, 13, 13, 13]) is None
+    assert index.lookup(path, [1, 1, 1, 1], 1) is None
+    assert index.lookup(path, [1, 1, 1, 1], 99) is None
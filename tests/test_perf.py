@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+'''the perf regression suite, skipped unless GAME24_PERF is set:
+
+    GAME24_PERF=save python -m pytest tests/test_perf.py   # store baselines
+    GAME24_PERF=check python -m pytest tests/test_perf.py  # compare
+
+a case fails if its throughput drops more than GAME24_PERF_THRESHOLD
+(default 0.25, i.e. 25%) below the stored baseline. the baselines are
+machine dependent, save them on the machine the checks run on.'''
+
+from __future__ import absolute_import, print_function, division
+
+import io
+import itertools
+import json
+import os
+import random
+import timeit
+
+import pytest
+
+from game24 import calc
+
+
+PERF = os.environ.get('GAME24_PERF')
+THRESHOLD = float(os.environ.get('GAME24_PERF_THRESHOLD', '0.25'))
+BASELINE = os.path.join(os.path.dirname(__file__), 'perf_baseline.json')
+
+pytestmark = pytest.mark.skipif(PERF not in ('save', 'check'),
+        reason='set GAME24_PERF=save|check to run the perf regression suite')
+
+
+rand = random.Random(24)
+HANDS4 = rand.sample(list(
+            itertools.combinations_with_replacement(range(1, 14), 4)), 100)
+HANDS5 = [[rand.randint(1, 13) for i in range(5)] for j in range(3)]
+
+_answers = []
+
+def answers():
+    if not _answers:
+        _answers.extend([str(e) for h in HANDS4 for e in calc.solve(list(h))])
+    return _answers
+
+
+def case_solve4():
+    for integers in HANDS4:
+        calc.solve(list(integers))
+    return len(HANDS4)
+
+
+def case_solve5():
+    for integers in HANDS5:
+        calc.solve(integers)
+    return len(HANDS5)
+
+
+def case_reachable4():
+    for integers in HANDS4:
+        calc.reachable(integers)
+    return len(HANDS4)
+
+
+def case_parse():
+    for s in answers():
+        calc.parse(s)
+    return len(answers())
+
+
+def case_parse_key():
+    for s in answers():
+        calc.parse(s).canonical_key()
+    return len(answers())
+
+
+CASES = dict([(name[len('case_'):], f) for name, f in globals().items()
+                if name.startswith('case_')])
+
+
+def throughput(case, repeat=3):
+    '''operations per second, the best of the runs'''
+    t = min(timeit.repeat(case, number=1, repeat=repeat))
+    return case() / t
+
+
+def load_baseline():
+    if not os.path.exists(BASELINE):
+        return {}
+    with io.open(BASELINE, encoding='utf-8') as f:
+        return json.load(f)
+
+
+@pytest.mark.parametrize('name', sorted(CASES))
+def test_perf(name):
+    ops = throughput(CASES[name])
+    baseline = load_baseline()
+
+    if PERF == 'save':
+        baseline[name] = round(ops, 1)
+        with io.open(BASELINE, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(baseline, indent=2, sort_keys=True) + u'\n')
+        return
+
+    if name not in baseline:
+        pytest.skip('no baseline of %s' % name)
+
+    floor = baseline[name] * (1 - THRESHOLD)
+    assert ops >= floor, '%s: %.1f ops/s, baseline %.1f ops/s' % (
+                                            name, ops, baseline[name])
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, print_function, division
+
+import os
+
+import pytest
+
+from game24 import game, store
+
+
+def test_record_and_query(tmpdir):
+    db = str(tmpdir.join('stats.db'))
+    s = store.StatsStore(db)
+    s.record('amy', [8, 3, 8, 3], 24, game.HAND_RESULT_SOLVED, 10.0, 0, 1.0)
+    s.record('amy', [1, 1, 1, 1], 24, game.HAND_RESULT_FAILED, None, 2, 2.0)
+    s.record('bob', [3, 3, 8, 8], 24, game.HAND_RESULT_HINTED, 30.0, 1, 3.0)
+
+    assert s.leaderboard() == [('amy', 2, 1, 0, 10.0), ('bob', 1, 0, 1, 30.0)]
+    assert s.hand_stats([3, 8, 3, 8]) == (2, 1, 1, 20.0, 1)
+    assert s.hand_stats([3, 8, 3, 8], 10) == (0, None, None, None, None)
+    assert [r['hand'] for r in s.history('amy')] == ['1 1 1 1', '3 3 8 8']
+    s.close()
+
+    # the log rebuilds the same database
+    db2 = str(tmpdir.join('stats2.db'))
+    assert store.replay(db + '.log', db2) == 3
+    s = store.StatsStore(db2)
+    assert s.leaderboard() == [('amy', 2, 1, 0, 10.0), ('bob', 1, 0, 1, 30.0)]
+    s.close()
+
+
+def test_game_records_ended_hands(tmpdir):
+    db = str(tmpdir.join('stats.db'))
+    g = game.Game(store=store.StatsStore(db), player='amy')
+    hand = g.new_hand()
+    hand.hinted()
+    hand.solved()
+    g.new_hand()
+    g.close()
+
+    s = store.StatsStore(db)
+    history = s.history('amy')
+    assert len(history) == 2
+    assert history[1]['result'] == game.HAND_RESULT_HINTED
+    assert history[1]['hints'] == 1
+    assert history[1]['seconds'] is not None
+    assert history[0]['result'] == game.HAND_RESULT_FAILED
+    s.close()
+    assert os.path.exists(db + '.log')
+
+
+def test_write_errors(tmpdir):
+    db = str(tmpdir.join('stats.db'))
+    s = store.StatsStore(db)
+    with pytest.raises(ValueError):
+        s.record(None, [1, 2, 3, 4], 24, game.HAND_RESULT_SOLVED, 1.0, 0, 1.0)
+
+    # a failed batch is reported, and the queries don't wait for it
+    s.record('amy', [1, 2, 3, 4], 24, None, 1.0, 0, 1.0)
+    s.flush()
+    s.record('amy', [1, 2, 3, 4], 24, game.HAND_RESULT_SOLVED, 1.0, 0, 2.0)
+    assert s.leaderboard() == [('amy', 1, 1, 0, 1.0)]
+    assert s.errors == 1 and s.error is not None
+    s.close()
+
+    # the game records the hands of no player as the default player
+    g = game.Game(store=store.StatsStore(db))
+    g.new_hand()
+    g.close()
+    s = store.StatsStore(db)
+    assert [r['player'] for r in s.history(game.DEFAULT_PLAYER)] == \
+            [game.DEFAULT_PLAYER]
+    assert s.errors == 0
+    s.close()
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, print_function, division
+
+import io
+import os
+
+import pytest
+
+from game24 import calc, game, tracing
+
+
+def work(args):
+    calc.solve([1, 2, 3, 4])
+    calc.parse('8/(3-8/3)')
+    game.Hand([game.Card(0x1F0A3, 3), game.Card(0x1F0A8, 8)])
+    raise SystemExit(0)
+
+
+@pytest.mark.parametrize('profiler', [tracing.PROFILER_CPROFILE,
+                                        tracing.PROFILER_SAMPLE])
+def test_run(tmpdir, profiler):
+    solve = calc.solve
+    out = str(tmpdir.join('24game.prof'))
+    report = io.StringIO() if str is not bytes else io.BytesIO()
+    with pytest.raises(SystemExit):
+        tracing.run(work, None, out, profiler, report)
+
+    # the functions are unwrapped after the run
+    assert calc.solve is solve
+    report = report.getvalue()
+    for name in ('calc.solve', 'calc.parse', 'Hand.__init__'):
+        assert name in report
+    assert os.path.exists(out + '.collapsed')
+    assert os.path.exists(out) == (profiler == tracing.PROFILER_CPROFILE)